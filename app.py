@@ -11,12 +11,15 @@ Authorship (git history, mapped to real names):
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+import functools
 import hashlib
+import http.client
 import secrets
-from typing import Iterable, Optional, Tuple
-from urllib.parse import parse_qs, urlencode
-from urllib import error as urllib_error, request as urllib_request
+from typing import Callable, Iterable, Optional, Tuple
+from urllib.parse import quote, unquote_plus, urlencode, urlsplit
+from urllib import request as urllib_request
 import base64
+import binascii
 import collections
 import io
 import json
@@ -31,7 +34,13 @@ from b2sdk.v2 import B2Api, InMemoryAccountInfo
 from markupsafe import escape
 from robyn import Request, Response, Robyn
 from robyn.templating import JinjaTemplate
-import mimetypes
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    select_autoescape,
+)
 import logging
 import asyncio
 
@@ -39,6 +48,11 @@ import tempfile
 import cv2
 import numpy as np
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency in some environments
+    orjson = None
+
 try:
     from PIL import Image, UnidentifiedImageError
 except ImportError:  # pragma: no cover - optional dependency in some environments
@@ -75,7 +89,57 @@ logger = logging.getLogger(__name__)
 current_file_path = pathlib.Path(__file__).parent.resolve()
 static_dir = current_file_path / "frontend" / "static"
 
-jinja_template = JinjaTemplate(os.path.join(current_file_path, "frontend/pages"))
+
+
+class CachedJinjaTemplate(JinjaTemplate):
+    """Jinja renderer that compiles every page once and never re-stats files.
+
+    Robyn's default environment checks template mtimes on each render; pages
+    only change on deploy, so we disable auto-reload, keep compiled templates
+    in memory, and persist bytecode so restarted workers skip the parse step.
+    """
+
+    def __init__(self, directory: str, *, persist_bytecode: bool = True) -> None:
+        bytecode_cache = None
+        if persist_bytecode:
+            # Jinja's default directory is per-user, created 0700 and verified to be
+            # owned by us, so other local users cannot plant bytecode for us to load.
+            # Jinja keys bytecode by template name only, so the file pattern
+            # names the autoescape mode: bytecode compiled before autoescaping
+            # was enabled must never be loaded by this environment.
+            try:
+                bytecode_cache = FileSystemBytecodeCache(
+                    pattern="__taglens_autoescape_%s.cache"
+                )
+            except (OSError, RuntimeError):
+                logger.warning("Jinja bytecode cache disabled", exc_info=True)
+        self.env = Environment(
+            loader=FileSystemLoader(searchpath=directory),
+            auto_reload=False,
+            cache_size=400,
+            bytecode_cache=bytecode_cache,
+            autoescape=select_autoescape(["html"]),
+        )
+        self._templates: dict[str, Template] = {}
+        for name in self.env.list_templates(extensions=["html"]):
+            self._templates[name] = self.env.get_template(name)
+
+    def render(self, template_name: str, **kwargs) -> str:
+        template = self._templates.get(template_name)
+        if template is None:
+            template = self.env.get_template(template_name)
+            self._templates[template_name] = template
+        return template.render(**kwargs)
+
+    def render_template(self, template_name: str, **kwargs) -> Response:
+        return Response(
+            status_code=200,
+            description=self.render(template_name, **kwargs),
+            headers={"Content-Type": "text/html; charset=utf-8"},
+        )
+
+
+jinja_template = CachedJinjaTemplate(os.path.join(current_file_path, "frontend/pages"))
 
 # ---------------------------------------------------------------------------
 # API documentation settings (Swagger/OpenAPI).
@@ -140,6 +204,8 @@ DIRECT_B2_UPLOAD = _env_truthy("TAGLENS_DIRECT_B2_UPLOAD")
 
 _signed_url_cache: dict[str, tuple[float, str]] = {}
 _signed_url_lock = threading.Lock()
+# (bucket, download URL prefix); keyed by bucket so re-initialisation is safe.
+_b2_download_base: Optional[tuple[object, str]] = None
 
 
 def _initialize_b2_bucket() -> None:
@@ -186,41 +252,96 @@ class AuthContext:
     clear_cookie: bool
 
 
+def _parse_cookie_header(cookie_header: str) -> dict[str, str]:
+    """Parse a Cookie header in a single find()-driven pass.
+
+    Not memoized: the header carries session and CSRF secrets, and a
+    process-wide cache would keep them in memory long after logout.
+    """
+    cookies: dict[str, str] = {}
+    pos = 0
+    length = len(cookie_header)
+    while pos < length:
+        semi = cookie_header.find(";", pos)
+        end = length if semi < 0 else semi
+        eq = cookie_header.find("=", pos, end)
+        if eq >= 0:
+            key = cookie_header[pos:eq].strip()
+            # First occurrence wins, matching browsers' most-specific-path order.
+            if key and key not in cookies:
+                cookies[key] = cookie_header[eq + 1 : end].strip()
+        pos = end + 1
+    return cookies
+
+
+def _request_cookies(request: Request) -> dict[str, str]:
+    """Parse every cookie on the request once, for handlers that read several."""
+    cookie_header = request.headers.get("cookie")
+    if not cookie_header:
+        return {}
+    return _parse_cookie_header(cookie_header)
+
+
 def _get_cookie_value(request: Request, name: str) -> Optional[str]:
-    """Extract a single cookie value from the request headers."""
+    """Extract a single cookie value from the request headers.
+
+    Jumps straight to occurrences of ``name`` instead of tokenizing every
+    cookie. A hit only counts when it is the whole key of a cookie pair, so
+    the same text inside another cookie's name or value is skipped; the
+    result matches the first-wins lookup of _parse_cookie_header.
+    """
     cookie_header = request.headers.get("cookie")
     if not cookie_header:
         return None
-    for chunk in cookie_header.split(";"):
-        key, sep, value = chunk.strip().partition("=")
-        if not sep:
-            continue
-        if key.strip() == name:
-            return value
+    length = len(cookie_header)
+    pos = cookie_header.find(name)
+    while pos >= 0:
+        start = cookie_header.rfind(";", 0, pos) + 1
+        if not cookie_header[start:pos].strip():
+            eq = pos + len(name)
+            while eq < length and cookie_header[eq].isspace():
+                eq += 1
+            if eq < length and cookie_header[eq] == "=":
+                end = cookie_header.find(";", eq)
+                return cookie_header[eq + 1 : length if end < 0 else end].strip()
+        pos = cookie_header.find(name, pos + 1)
     return None
 
 
 def _form_data(request: Request) -> dict[str, str]:
     """Return form fields, including urlencoded fallback parsing for Robyn 0.77."""
-    native = request.form_data or {}
+    native = request.form_data
     if native:
-        return {str(k): str(v) for k, v in native.items()}
+        # Robyn already hands back a fresh dict[str, str]; no need to rebuild it.
+        return native
     content_type = (request.headers.get("content-type") or "").lower()
     if "application/x-www-form-urlencoded" not in content_type:
         return {}
     raw_body = request.body
-    if isinstance(raw_body, (bytes, bytearray)):
-        body_bytes = bytes(raw_body)
-    elif isinstance(raw_body, list):
-        body_bytes = bytes(raw_body)
-    elif isinstance(raw_body, str):
-        body_bytes = raw_body.encode("utf-8")
+    if isinstance(raw_body, str):
+        body_text = raw_body
+    elif isinstance(raw_body, (bytes, bytearray, list)):
+        body_text = bytes(raw_body).decode("utf-8", errors="replace")
     else:
         return {}
-    parsed = parse_qs(
-        body_bytes.decode("utf-8", errors="replace"), keep_blank_values=True
-    )
-    return {key: values[0] if values else "" for key, values in parsed.items()}
+    return _parse_qs_flat(body_text)
+
+
+def _parse_qs_flat(query: str) -> dict[str, str]:
+    """Parse an urlencoded string straight into a flat dict (first value wins).
+
+    Equivalent to taking ``values[0]`` from ``parse_qs(..., keep_blank_values=True)``
+    without building a list per key.
+    """
+    fields: dict[str, str] = {}
+    for pair in query.split("&"):
+        if not pair:
+            continue
+        key, _, value = pair.partition("=")
+        key = unquote_plus(key)
+        if key not in fields:
+            fields[key] = unquote_plus(value)
+    return fields
 
 
 def _raw_body_bytes(request: Request) -> bytes:
@@ -241,17 +362,47 @@ def _json_data(request: Request) -> dict:
     if not body:
         return {}
     try:
-        parsed = json.loads(body.decode("utf-8", errors="replace"))
-    except json.JSONDecodeError:
+        parsed = _json_loads(body)
+    except ValueError:
         return {}
     return parsed if isinstance(parsed, dict) else {}
 
 
+def _parse_photo_id(raw: object) -> Optional[int]:
+    """Parse a photo id made of ASCII digits only; return None when invalid."""
+    text = str(raw).strip()
+    # int() alone would also take "+5", "1_000" and non-ASCII digits.
+    if not (text.isascii() and text.isdigit()):
+        return None
+    return int(text)
+
+
 def _now_iso() -> str:
     """UTC timestamp in ISO-8601 format."""
     return _utc_now().isoformat()
 
 
+# (epoch seconds, ISO string) for _now_iso_coarse; replaced as one tuple so
+# concurrent readers never observe a half-updated pair.
+_coarse_now_iso: Tuple[float, str] = (0.0, "")
+
+
+def _now_iso_coarse() -> str:
+    """UTC ISO timestamp refreshed at most once per second.
+
+    For high-frequency bookkeeping (session activity, health probes) where
+    second granularity is plenty; revocations and record writes keep using
+    the exact _now_iso().
+    """
+    global _coarse_now_iso
+    now = time.time()
+    cached_at, value = _coarse_now_iso
+    if now - cached_at >= 1.0:
+        value = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        _coarse_now_iso = (now, value)
+    return value
+
+
 def _utc_now() -> datetime:
     """UTC datetime helper used across sessions and metadata."""
     return datetime.now(timezone.utc)
@@ -264,11 +415,21 @@ def _as_utc(value: datetime) -> datetime:
     return value.astimezone(timezone.utc)
 
 
+@functools.lru_cache(maxsize=4096)
+def _parse_iso_epoch(value: str) -> float:
+    """Parse a stored ISO timestamp (naive values are UTC) into epoch seconds.
+
+    Session and share expiries are re-checked on every request but rarely
+    change, so the parsed value is memoized per string.
+    """
+    return _as_utc(datetime.fromisoformat(value)).timestamp()
+
+
 def _is_expired(expires_at: str) -> bool:
     """Return True if a stored ISO timestamp is in the past."""
     try:
-        return _as_utc(datetime.fromisoformat(expires_at)) <= _utc_now()
-    except ValueError:
+        return _parse_iso_epoch(expires_at) <= time.time()
+    except (TypeError, ValueError):
         return True
 
 
@@ -307,9 +468,9 @@ def _allow_rate_limited_request(limiter: RateLimiter, request: Request) -> bool:
     return limiter.is_allowed(_client_ip(request))
 
 
-def _cookie_header(name: str, value: str, settings: dict) -> str:
-    """Build a Set-Cookie header value from common settings."""
-    parts = [f"{name}={value}"]
+def _cookie_attributes(settings: dict) -> str:
+    """Render the attribute part of a Set-Cookie header from common settings."""
+    parts = []
     max_age = settings.get("max_age")
     if max_age is not None:
         parts.append(f"Max-Age={int(max_age)}")
@@ -330,24 +491,42 @@ def _cookie_header(name: str, value: str, settings: dict) -> str:
     return "; ".join(parts)
 
 
-def _append_set_cookie(response: Response, name: str, value: str, settings: dict) -> None:
+def _format_cookie(name: str, value: str, attributes: str) -> str:
+    """Join a cookie pair with a pre-rendered attribute string."""
+    return f"{name}={value}; {attributes}" if attributes else f"{name}={value}"
+
+
+def _cookie_header(name: str, value: str, settings: dict) -> str:
+    """Build a Set-Cookie header value from common settings."""
+    return _format_cookie(name, value, _cookie_attributes(settings))
+
+
+def _append_set_cookie(response: Response, name: str, value: str, attributes: str) -> None:
     """Append a Set-Cookie header without clobbering existing cookies."""
-    response.headers.append("Set-Cookie", _cookie_header(name, value, settings))
+    response.headers.append("Set-Cookie", _format_cookie(name, value, attributes))
+
+
+# Cookie settings only depend on environment flags read at startup, so the
+# attribute suffixes are rendered once instead of on every cookie write.
+_CSRF_COOKIE_ATTRIBUTES = _cookie_attributes(csrf_cookie_settings())
+_SESSION_COOKIE_ATTRIBUTES = _cookie_attributes(cookie_settings())
+_CLEAR_SESSION_COOKIE = _cookie_header(SESSION_COOKIE_NAME, "", cookie_clear_settings())
+_SESSION_LIFETIME = timedelta(seconds=session_expiration())
 
 
 def _set_csrf_cookie(response: Response, token: str) -> None:
     """Set CSRF cookie using standard settings."""
-    _append_set_cookie(response, CSRF_COOKIE_NAME, token, csrf_cookie_settings())
+    _append_set_cookie(response, CSRF_COOKIE_NAME, token, _CSRF_COOKIE_ATTRIBUTES)
 
 
 def _set_session_cookie(response: Response, token: str) -> None:
     """Set session cookie using standard settings."""
-    _append_set_cookie(response, SESSION_COOKIE_NAME, token, cookie_settings())
+    _append_set_cookie(response, SESSION_COOKIE_NAME, token, _SESSION_COOKIE_ATTRIBUTES)
 
 
 def _clear_session_cookie(response: Response) -> None:
     """Expire the session cookie immediately."""
-    _append_set_cookie(response, SESSION_COOKIE_NAME, "", cookie_clear_settings())
+    response.headers.append("Set-Cookie", _CLEAR_SESSION_COOKIE)
 
 
 def _apply_common_cookies(
@@ -373,35 +552,34 @@ def _html_response(body: str, *, status: int = 200) -> Response:
     )
 
 
+# The nav bar only varies by auth state, username and CSRF token, so the fixed
+# markup is joined once here and each render escapes just the per-user values.
+# Nothing is cached per user: the logout form carries the CSRF secret.
+_NAV_ANONYMOUS = (
+    '<nav><a href="/">Home</a> | <a href="/register">Register</a> | <a href="/login">Log in</a></nav>'
+)
+_NAV_USER_OPEN = (
+    '<nav><a href="/">Home</a> | <a href="/dashboard">Dashboard</a> | '
+    '<a href="/profile">Profile</a> | <span class="status">Signed in as '
+)
+_NAV_LOGOUT_OPEN = (
+    '</span> | \n                <form method="post" action="/logout" class="logout-form">\n'
+    '                  <input type="hidden" name="csrf_token" value="'
+)
+_NAV_LOGOUT_CLOSE = (
+    '">\n                  <button type="submit">Log out</button>\n'
+    "                </form>\n            </nav>"
+)
+
+
 def _build_nav(user: Optional[UserRecord], csrf_token: Optional[str]) -> str:
     """Render the shared navigation bar shown at the top of every page."""
-    links = ['<a href="/">Home</a>']
-    if user:
-        logout_html = ""
-        if csrf_token:
-            logout_html = f"""
-                <form method="post" action="/logout" class="logout-form">
-                  <input type="hidden" name="csrf_token" value="{escape(csrf_token)}">
-                  <button type="submit">Log out</button>
-                </form>
-            """
-        links.extend(
-            [
-                '<a href="/dashboard">Dashboard</a>',
-                '<a href="/profile">Profile</a>',
-                f'<span class="status">Signed in as {escape(user.username)}</span>',
-            ]
-        )
-        if logout_html:
-            links.append(logout_html)
-    else:
-        links.extend(
-            [
-                '<a href="/register">Register</a>',
-                '<a href="/login">Log in</a>',
-            ]
-        )
-    return """<nav>""" + " | ".join(links) + """</nav>"""
+    if not user:
+        return _NAV_ANONYMOUS
+    username = escape(user.username)
+    if not csrf_token:
+        return f"{_NAV_USER_OPEN}{username}</span></nav>"
+    return f"{_NAV_USER_OPEN}{username}{_NAV_LOGOUT_OPEN}{escape(csrf_token)}{_NAV_LOGOUT_CLOSE}"
 
 
 def _message_block(messages: Iterable[str], kind: str = "info") -> str:
@@ -416,6 +594,48 @@ def _message_block(messages: Iterable[str], kind: str = "info") -> str:
     """
 
 
+# The page chrome never changes between requests, so it is assembled once at
+# import time and each render only joins the dynamic fragments in between.
+# Styles live in /styles.css so browsers cache them instead of receiving them
+# inline with every page; the link carries a content hash, so the versioned
+# URL can be cached as immutable and a deploy that edits the CSS busts it.
+_PAGE_CSS = b"""body { font-family: system-ui, sans-serif; max-width: 900px; margin: 0 auto; padding: 1.5rem; }
+nav { margin-bottom: 1rem; display: flex; gap: 0.5rem; align-items: center; flex-wrap: wrap; }
+nav a { text-decoration: none; color: #0f62fe; font-weight: 600; }
+nav .logout-form { display: inline; margin: 0; }
+nav .logout-form button { width: auto; padding: 0.35rem 0.75rem; font-size: 0.9rem; }
+.message { border-radius: 6px; padding: 0.75rem 1rem; margin-bottom: 1.25rem; }
+.message.info { background: #e8f0fe; border: 1px solid #bad1fe; }
+.message.error { background: #ffe3e3; border: 1px solid #f5b7b7; }
+.status { font-weight: 600; }
+footer { margin-top: 3rem; font-size: 0.9rem; color: #555; }
+input, button { font: inherit; margin-top: 0.25rem; width: 100%; padding: 0.6rem; border-radius: 6px; border: 1px solid #c4c4c4; }
+button { cursor: pointer; background: #0f62fe; border: none; color: white; font-weight: 600; }
+form { max-width: 380px; }
+"""
+_PAGE_CSS_VERSION = hashlib.sha256(_PAGE_CSS).hexdigest()[:16]
+_PAGE_HEAD_OPEN = """<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width,initial-scale=1">
+  <title>"""
+_PAGE_HEAD_CLOSE = f"""</title>
+  <link rel="stylesheet" href="/styles.css?v={_PAGE_CSS_VERSION}">
+</head>
+<body>
+  <header>
+    <h1>"""
+_PAGE_HEADER_CLOSE = "</h1>\n    "
+_PAGE_MAIN_OPEN = "\n  </header>\n  <main>\n    "
+_PAGE_TAIL = """
+  </main>
+  <footer>This service is run with Robyn and keeps credentials hashed.</footer>
+</body>
+</html>
+"""
+
+
 def _page_template(
     *,
     title: str,
@@ -428,42 +648,119 @@ def _page_template(
     """Wrap any page body inside a styled template with optional flash messages."""
     nav = _build_nav(user, csrf_token)
     message_html = _message_block(messages or [], message_kind)
-    return f"""
-<!doctype html>
-<html lang=\"en\">
-<head>
-  <meta charset=\"utf-8\">
-  <meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">
-  <title>{escape(title)}</title>
-  <style>
-    body {{ font-family: system-ui, sans-serif; max-width: 900px; margin: 0 auto; padding: 1.5rem; }}
-    nav {{ margin-bottom: 1rem; display: flex; gap: 0.5rem; align-items: center; flex-wrap: wrap; }}
-    nav a {{ text-decoration: none; color: #0f62fe; font-weight: 600; }}
-    nav .logout-form {{ display: inline; margin: 0; }}
-    nav .logout-form button {{ width: auto; padding: 0.35rem 0.75rem; font-size: 0.9rem; }}
-    .message {{ border-radius: 6px; padding: 0.75rem 1rem; margin-bottom: 1.25rem; }}
-    .message.info {{ background: #e8f0fe; border: 1px solid #bad1fe; }}
-    .message.error {{ background: #ffe3e3; border: 1px solid #f5b7b7; }}
-    .status {{ font-weight: 600; }}
-    footer {{ margin-top: 3rem; font-size: 0.9rem; color: #555; }}
-    input, button {{ font: inherit; margin-top: 0.25rem; width: 100%; padding: 0.6rem; border-radius: 6px; border: 1px solid #c4c4c4; }}
-    button {{ cursor: pointer; background: #0f62fe; border: none; color: white; font-weight: 600; }}
-    form {{ max-width: 380px; }}
-  </style>
-</head>
-<body>
-  <header>
-    <h1>{escape(title)}</h1>
-    {nav}
-  </header>
-  <main>
-    {message_html}
-    {body}
-  </main>
-  <footer>This service is run with Robyn and keeps credentials hashed.</footer>
-</body>
-</html>
-"""
+    escaped_title = escape(title)
+    return "".join(
+        (
+            _PAGE_HEAD_OPEN,
+            escaped_title,
+            _PAGE_HEAD_CLOSE,
+            escaped_title,
+            _PAGE_HEADER_CLOSE,
+            nav,
+            _PAGE_MAIN_OPEN,
+            message_html,
+            body,
+            _PAGE_TAIL,
+        )
+    )
+
+
+# last_seen_at is advisory, so activity timestamps are buffered in memory and
+# flushed in one batch instead of costing a write on every authenticated request.
+SESSION_TOUCH_FLUSH_SECONDS = 5.0
+_pending_session_touches: dict[int, str] = {}
+_last_session_touch_flush = time.monotonic()
+_session_touch_task: Optional[asyncio.Task] = None
+
+
+def _queue_session_touch(session_id: int) -> None:
+    """Record session activity and schedule a batched flush when one is due."""
+    global _session_touch_task
+    _pending_session_touches[session_id] = _now_iso_coarse()
+    if _session_touch_task is not None and not _session_touch_task.done():
+        return
+    if time.monotonic() - _last_session_touch_flush < SESSION_TOUCH_FLUSH_SECONDS:
+        return
+    _session_touch_task = asyncio.create_task(_flush_session_touches())
+
+
+async def _flush_session_touches() -> None:
+    """Write all buffered session activity timestamps in a single transaction."""
+    global _last_session_touch_flush
+    _last_session_touch_flush = time.monotonic()
+    if not _pending_session_touches:
+        return
+    batch = list(_pending_session_touches.items())
+    _pending_session_touches.clear()
+    try:
+        await db.touch_sessions(batch)
+    except Exception:
+        logger.exception("failed to flush %s session touches", len(batch))
+
+
+async def _shutdown_database() -> None:
+    """Flush buffered session activity and release pooled sqlite connections."""
+    if _session_touch_task is not None and not _session_touch_task.done():
+        await _session_touch_task
+    await _flush_session_touches()
+    await db.close()
+
+
+app.shutdown_handler(_shutdown_database)
+
+
+# Resolved (session, user) pairs keyed by token hash, so page loads inside the
+# TTL skip the sqlite lookup. Entries are dropped when this process revokes a
+# session; expiry is still checked against the cached row on every request.
+AUTH_CACHE_TTL_SECONDS = 30.0
+AUTH_CACHE_MAX_ENTRIES = 4096
+_auth_cache: dict[str, tuple[float, SessionRecord, UserRecord]] = {}
+# Bumped on every eviction. A lookup that was in flight across an eviction may
+# have read the row before the revocation landed, so it must not be cached.
+_auth_cache_generation = 0
+
+
+def _lookup_cached_auth(token_hash: str) -> Optional[tuple[SessionRecord, UserRecord]]:
+    """Return a still-fresh cached (session, user) pair for a token hash."""
+    cached = _auth_cache.get(token_hash)
+    if cached is None:
+        return None
+    if cached[0] <= time.monotonic():
+        _auth_cache.pop(token_hash, None)
+        return None
+    return cached[1], cached[2]
+
+
+def _store_cached_auth(
+    token_hash: str, session: SessionRecord, user: UserRecord, *, generation: int
+) -> None:
+    """Remember a resolved session, evicting the oldest entry when full.
+
+    ``generation`` is the value of ``_auth_cache_generation`` read before the
+    lookup started; the entry is dropped if any eviction happened since.
+    """
+    if generation != _auth_cache_generation:
+        return
+    if len(_auth_cache) >= AUTH_CACHE_MAX_ENTRIES:
+        _auth_cache.pop(next(iter(_auth_cache)), None)
+    _auth_cache[token_hash] = (time.monotonic() + AUTH_CACHE_TTL_SECONDS, session, user)
+
+
+def _evict_cached_auth(token_hash: str) -> None:
+    """Drop a cached session and invalidate lookups still in flight."""
+    global _auth_cache_generation
+    _auth_cache_generation += 1
+    _auth_cache.pop(token_hash, None)
+
+
+async def _revoke_session_token(token: str) -> None:
+    """Revoke a session by its raw cookie token and drop it from the auth cache."""
+    token_hash = hash_session_token(token)
+    _evict_cached_auth(token_hash)
+    await db.revoke_session_by_hash(token_hash, _now_iso())
+    # Lookups that started while the UPDATE was pending may have read the old
+    # row; evicting again makes them skip the cache.
+    _evict_cached_auth(token_hash)
 
 
 async def _get_auth_context(request: Request) -> AuthContext:
@@ -472,17 +769,21 @@ async def _get_auth_context(request: Request) -> AuthContext:
     if not token:
         return AuthContext(user=None, session=None, clear_cookie=False)
     token_hash = hash_session_token(token)
-    session = await db.fetch_session_by_token_hash(token_hash)
-    if not session:
-        return AuthContext(user=None, session=None, clear_cookie=True)
+    found = _lookup_cached_auth(token_hash)
+    if found is None:
+        generation = _auth_cache_generation
+        found = await db.fetch_session_and_user_by_token_hash(token_hash)
+        if not found:
+            return AuthContext(user=None, session=None, clear_cookie=True)
+        if not found[0].revoked_at:
+            _store_cached_auth(token_hash, *found, generation=generation)
+    session, user = found
     if session.revoked_at or _is_expired(session.expires_at):
         if not session.revoked_at:
+            _evict_cached_auth(token_hash)
             await db.revoke_session(session.id, _now_iso())
         return AuthContext(user=None, session=None, clear_cookie=True)
-    user = await db.fetch_user_by_id(session.user_id)
-    if not user:
-        return AuthContext(user=None, session=None, clear_cookie=True)
-    await db.touch_session(session.id, _now_iso())
+    _queue_session_touch(session.id)
     return AuthContext(user=user, session=session, clear_cookie=False)
 
 
@@ -500,12 +801,27 @@ def _redirect(location: str) -> Response:
     )
 
 
+def _json_dumps_bytes(payload: object) -> bytes:
+    """Serialize to UTF-8 JSON, using orjson's C encoder when installed."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload).encode("utf-8")
+
+
+def _json_loads(raw: bytes) -> object:
+    """Parse UTF-8 JSON bytes, using orjson's C decoder when installed."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    # json.loads detects UTF-8 bytes itself; decoding first would copy the body.
+    return json.loads(raw)
+
+
 def _json_response(payload: dict, *, status: int = 200) -> Response:
     """Return a JSON response with a UTF-8 content-type."""
     return Response(
         status_code=status,
         headers={"content-type": "application/json; charset=utf-8"},
-        description=json.dumps(payload),
+        description=_json_dumps_bytes(payload),
     )
 
 
@@ -550,7 +866,7 @@ async def _readiness_payload() -> Tuple[dict, int]:
             "db_ready": db_ready,
             "b2_configured": b2_configured,
             "b2_ready": b2_ready,
-            "time": _now_iso(),
+            "time": _now_iso_coarse(),
         },
         status,
     )
@@ -1179,15 +1495,41 @@ def _metadata_response_dict(record) -> dict:
     }
 
 
+# Extension fallback for uploads that arrive without a usable content type.
+# Only media types are listed; anything else is stored as octet-stream.
+_EXT_MIME = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".jpe": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".bmp": "image/bmp",
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+    ".heic": "image/heic",
+    ".heif": "image/heif",
+    ".avif": "image/avif",
+    ".mp4": "video/mp4",
+    ".m4v": "video/mp4",
+    ".mov": "video/quicktime",
+    ".webm": "video/webm",
+    ".avi": "video/x-msvideo",
+    ".mpg": "video/mpeg",
+    ".mpeg": "video/mpeg",
+    ".3gp": "video/3gpp",
+}
+
+
 def _normalize_content_type(content_type: str, filename: str) -> str:
     """Normalize content type; fall back to filename inference."""
     candidate = (content_type or "").strip().lower()
-    if candidate.startswith("image/") or or candidate.startswith("video/"):
+    if candidate.startswith(("image/", "video/")):
         return candidate
-    guessed, _ = mimetypes.guess_type(filename)
-    if guessed and (guessed.startswith("image/") or guessed.startswith("video/")):
-        return guessed
-    return "application/octet-stream"
+    _, dot, ext = filename.rpartition(".")
+    if not dot:
+        return "application/octet-stream"
+    return _EXT_MIME.get(f".{ext.lower()}", "application/octet-stream")
 
 
 def _parse_taken_at(value: object) -> Optional[str]:
@@ -1284,20 +1626,39 @@ def _fetch_bucket_image_bytes(user_id: int, photo_id: int, filename: str) -> Opt
         return response.read()
 
 
+def _b2_download_base_url() -> str:
+    """Return the bucket's download URL prefix, computed once per bucket."""
+    global _b2_download_base
+    current = bucket
+    cached = _b2_download_base
+    if cached is None or cached[0] is not current:
+        cached = (current, current.get_download_url(""))
+        _b2_download_base = cached
+    return cached[1]
+
+
+def _lookup_signed_url(file_key: str) -> Optional[str]:
+    """Return a still-valid cached signed URL without touching B2."""
+    now = time.monotonic()
+    with _signed_url_lock:
+        cached = _signed_url_cache.get(file_key)
+    if cached and cached[0] > now:
+        return cached[1]
+    return None
+
+
 def _get_cached_signed_url(file_key: str, *, valid_duration_in_seconds: int) -> str:
     if bucket is None:
         raise RuntimeError("Storage unavailable")
+    cached = _lookup_signed_url(file_key)
+    if cached:
+        return cached
     now = time.monotonic()
-    with _signed_url_lock:
-        cached = _signed_url_cache.get(file_key)
-        if cached and cached[0] > now:
-            return cached[1]
     auth_token = bucket.get_download_authorization(
         file_key,
         valid_duration_in_seconds=valid_duration_in_seconds,
     )
-    download_base = bucket.get_download_url("")
-    signed_url = f"{download_base}{file_key}?Authorization={auth_token}"
+    signed_url = f"{_b2_download_base_url()}{file_key}?Authorization={auth_token}"
     # Cache slightly shorter than token lifetime to avoid edge-of-expiry failures.
     cache_expires = now + max(0, valid_duration_in_seconds - 15)
     with _signed_url_lock:
@@ -1305,7 +1666,21 @@ def _get_cached_signed_url(file_key: str, *, valid_duration_in_seconds: int) ->
     return signed_url
 
 
-def _photo_view_response(
+async def _get_signed_url_async(file_key: str, *, valid_duration_in_seconds: int) -> str:
+    """Serve cached signed URLs inline; mint new ones off the event loop."""
+    if bucket is None:
+        raise RuntimeError("Storage unavailable")
+    cached = _lookup_signed_url(file_key)
+    if cached:
+        return cached
+    return await asyncio.to_thread(
+        _get_cached_signed_url,
+        file_key,
+        valid_duration_in_seconds=valid_duration_in_seconds,
+    )
+
+
+async def _photo_view_response(
     user_id: int,
     photo_id: int,
     record,
@@ -1331,7 +1706,7 @@ def _photo_view_response(
     if bucket is None:
         return Response(status_code=503, headers={}, description="Storage unavailable")
     b2_key = _photo_file_key(user_id, photo_id, record.filename)
-    signed_url = _get_cached_signed_url(b2_key, valid_duration_in_seconds=300)
+    signed_url = await _get_signed_url_async(b2_key, valid_duration_in_seconds=300)
 
     return Response(
         status_code=302,
@@ -1350,7 +1725,76 @@ def _normalize_image_for_ollama(image_bytes: bytes) -> str:
 
         out = io.BytesIO()
         img.save(out, format="JPEG", quality=92)
-        return base64.b64encode(out.getvalue()).decode("utf-8")
+        return binascii.b2a_base64(out.getbuffer(), newline=False).decode("ascii")
+
+
+_OLLAMA_CAPTION_PROMPT = (
+    "You are describing a user photo for search and organization. "
+    "Write 1-2 concise sentences with the key visible subjects, setting, and notable details."
+)
+_OLLAMA_OCR_PROMPT = (
+    "Extract all visible text from this image exactly as it appears. "
+    "Return only the raw text, no commentary, no formatting."
+)
+_OLLAMA_HEADERS = {"content-type": "application/json"}
+
+# Ollama calls run on worker threads (asyncio.to_thread and the metadata
+# pipeline), so each thread keeps its own keep-alive connection instead of
+# paying a TCP handshake per caption/OCR request.
+_ollama_local = threading.local()
+
+
+def _ollama_connection() -> Tuple[http.client.HTTPConnection, str]:
+    """Return this thread's connection to Ollama and the generate path."""
+    endpoint = _ollama_endpoint()
+    conn = getattr(_ollama_local, "conn", None)
+    if conn is None or _ollama_local.endpoint != endpoint:
+        if conn is not None:
+            conn.close()
+        parts = urlsplit(endpoint)
+        conn_cls = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        conn = conn_cls(parts.hostname or "localhost", parts.port, timeout=60)
+        _ollama_local.conn = conn
+        _ollama_local.endpoint = endpoint
+        _ollama_local.path = f"{parts.path.rstrip('/')}/api/generate"
+    return conn, _ollama_local.path
+
+
+def _ollama_generate(prompt: str, image_b64: str) -> object:
+    """POST a non-streaming generate request and return the decoded JSON body."""
+    body = _json_dumps_bytes(
+        {
+            "model": _ollama_model(),
+            "prompt": prompt,
+            "stream": False,
+            "images": [image_b64],
+            "keep_alive": -1,
+        }
+    )
+    for attempt in range(2):
+        conn, path = _ollama_connection()
+        try:
+            conn.request("POST", path, body=body, headers=_OLLAMA_HEADERS)
+            resp = conn.getresponse()
+            raw = resp.read()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            # Ollama may drop an idle keep-alive socket; retry once on a new one.
+            conn.close()
+            if attempt:
+                raise
+            continue
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            raise
+        if resp.status >= 400:
+            raise OSError(f"ollama returned HTTP {resp.status}")
+        return _json_loads(raw) if raw else {}
+    return {}
+
 
 def _generate_image_description_with_ollama(
     image_bytes: bytes,
@@ -1363,29 +1807,9 @@ def _generate_image_description_with_ollama(
         logger.warning("image normalization failed when captioning filename=%s error=%s", filename, exc)
         return ""
 
-    endpoint = f"{_ollama_endpoint()}/api/generate"
-    payload = {
-        "model": _ollama_model(),
-        "prompt": (
-            "You are describing a user photo for search and organization. "
-            "Write 1-2 concise sentences with the key visible subjects, setting, and notable details."
-        ),
-        "stream": False,
-        "images": [image_b64],
-        "keep_alive": -1
-    }
-    req = urllib_request.Request(
-        endpoint,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"content-type": "application/json"},
-        method="POST",
-    )
     try:
-        with urllib_request.urlopen(req, timeout=60) as resp:
-            raw = resp.read().decode("utf-8", errors="replace")
-            # logger.info("ollama raw response filename=%s body=%.200s", filename, raw)
-            parsed = json.loads(raw) if raw else {}
-    except (urllib_error.URLError, TimeoutError, json.JSONDecodeError) as exc:
+        parsed = _ollama_generate(_OLLAMA_CAPTION_PROMPT, image_b64)
+    except (http.client.HTTPException, OSError, ValueError) as exc:
         logger.warning("ollama caption failed filename=%s error=%s", filename, exc)
         return ""
     if not isinstance(parsed, dict):
@@ -1406,29 +1830,9 @@ def _generate_ocr_with_ollama(
         logger.warning("image normalization failed when OCRing filename=%s error=%s", filename, exc)
         return ""
 
-    endpoint = f"{_ollama_endpoint()}/api/generate"
-    payload = {
-        "model": _ollama_model(),
-        "prompt": (
-            "Extract all visible text from this image exactly as it appears. "
-            "Return only the raw text, no commentary, no formatting."
-        ),
-        "stream": False,
-        "images": [image_b64],
-        "keep_alive": -1
-    }
-    req = urllib_request.Request(
-        endpoint,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"content-type": "application/json"},
-        method="POST",
-    )
     try:
-        with urllib_request.urlopen(req, timeout=60) as resp:
-            raw = resp.read().decode("utf-8", errors="replace")
-            # logger.info("ollama raw response filename=%s body=%.200s", filename, raw)
-            parsed = json.loads(raw) if raw else {}
-    except (urllib_error.URLError, TimeoutError, json.JSONDecodeError) as exc:
+        parsed = _ollama_generate(_OLLAMA_OCR_PROMPT, image_b64)
+    except (http.client.HTTPException, OSError, ValueError) as exc:
         logger.warning("ollama ocr failed filename=%s error=%s", filename, exc)
         return ""
     if not isinstance(parsed, dict):
@@ -1439,6 +1843,24 @@ def _generate_ocr_with_ollama(
     return text
 
 
+def _ollama_max_concurrency() -> int:
+    raw = os.getenv("TAGLENS_OLLAMA_CONCURRENCY")
+    if raw and raw.isdigit() and int(raw) > 0:
+        return int(raw)
+    return 2
+
+
+# Caption/OCR requests queue here rather than piling onto the model server (and
+# the default thread pool) when several uploads arrive at once.
+_ollama_slots = asyncio.Semaphore(_ollama_max_concurrency())
+
+
+async def _run_ollama(func: Callable[..., str], image_bytes: bytes, *, filename: str) -> str:
+    """Run a blocking Ollama helper on a worker thread, bounded by _ollama_slots."""
+    async with _ollama_slots:
+        return await asyncio.to_thread(func, image_bytes, filename=filename)
+
+
 async def _process_image_job(job: JobRecord) -> None:
     payload: dict = {}
     try:
@@ -1469,7 +1891,7 @@ async def _process_image_job(job: JobRecord) -> None:
 
     if payload.get("do_ocr") is True:
         try:
-            ocr_text = await asyncio.to_thread(_generate_ocr_with_ollama, image_bytes, filename=record.filename)
+            ocr_text = await _run_ollama(_generate_ocr_with_ollama, image_bytes, filename=record.filename)
             extracted = await asyncio.to_thread(extract_upload_metadata, image_bytes)
             if record.taken_at is None and extracted.taken_at is not None:
                 taken_at = extracted.taken_at
@@ -1483,7 +1905,7 @@ async def _process_image_job(job: JobRecord) -> None:
 
     if payload.get("do_ai") is True:
         try:
-            ai_description = await asyncio.to_thread(
+            ai_description = await _run_ollama(
                 _generate_image_description_with_ollama,
                 image_bytes,
                 filename=record.filename,
@@ -1715,7 +2137,7 @@ def _register_form(
 @app.get("/healthz")
 async def healthz(_: Request) -> Response:
     """Simple liveness probe used by orchestrators."""
-    return _json_response({"ok": True, "time": _now_iso()})
+    return _json_response({"ok": True, "time": _now_iso_coarse()})
 
 
 @app.get("/readyz")
@@ -1733,7 +2155,7 @@ async def openapi_spec(request: Request) -> Response:
     return Response(
         status_code=200,
         headers={"content-type": "application/json; charset=utf-8"},
-        description=json.dumps(spec),
+        description=_json_dumps_bytes(spec),
     )
 
 
@@ -1751,23 +2173,17 @@ async def swagger_docs(_: Request) -> Response:
 # ---------------------------------------------------------------------------
 # Public-facing HTML routes.
 # ---------------------------------------------------------------------------
+# The landing page does not depend on the visitor (auth state only affects
+# cookies), so it is rendered once and every request reuses the same HTML.
+_HOME_PAGE_HTML = jinja_template.render("base/Base.html", title="Welcome to TagLens")
+
+
 @app.get("/")
 async def home(request: Request) -> Response:
     """Landing page that always renders regardless of authentication state."""
     context = await _get_auth_context(request)
     csrf_token, set_csrf = _get_or_create_csrf_token(request)
-    body = """
-    <section>
-      <p>TagLens keeps every sensitive credential hashed and salted before hitting the database.</p>
-      <p>Navigate using the links above; authenticated areas require a session cookie.</p>
-    </section>
-    """
-    response = jinja_template.render_template(
-        "base/Base.html",
-        request=request,
-        title="Welcome to TagLens",
-        body=body,
-    )
+    response = _html_response(_HOME_PAGE_HTML)
     _apply_common_cookies(
         response,
         clear_session=context.clear_cookie,
@@ -1841,30 +2257,96 @@ async def profile(request: Request) -> Response:
 # ---------------------------------------------------------------------------
 # Legacy static/script hooks.
 # ---------------------------------------------------------------------------
-@app.get("/UserProfile.js")
-async def profile_js(_: Request) -> Response:
-    """Placeholder script endpoint (legacy client hook)."""
-    content = "console.info('UserProfile.js placeholder loaded.');"
+def _asset_etag(body: bytes) -> str:
+    """Strong ETag for an in-memory asset."""
+    return f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+
+def _cached_asset_response(
+    request: Request,
+    body: bytes,
+    *,
+    etag: str,
+    content_type: str,
+    max_age: int,
+    immutable: bool = False,
+) -> Response:
+    """Serve a constant asset with cache headers, answering revalidation with 304."""
+    cache_control = f"public, max-age={max_age}"
+    if immutable:
+        cache_control += ", immutable"
+    cache_headers = {
+        "cache-control": cache_control,
+        "etag": etag,
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers, description=b"")
     return Response(
         status_code=200,
-        headers={"content-type": "application/javascript; charset=utf-8"},
-        description=content,
+        headers={"content-type": content_type, **cache_headers},
+        description=body,
+    )
+
+
+_USER_PROFILE_JS = b"console.info('UserProfile.js placeholder loaded.');"
+_USER_PROFILE_JS_ETAG = _asset_etag(_USER_PROFILE_JS)
+_PAGE_CSS_ETAG = _asset_etag(_PAGE_CSS)
+
+
+@app.get("/UserProfile.js")
+async def profile_js(request: Request) -> Response:
+    """Placeholder script endpoint (legacy client hook)."""
+    return _cached_asset_response(
+        request,
+        _USER_PROFILE_JS,
+        etag=_USER_PROFILE_JS_ETAG,
+        content_type="application/javascript; charset=utf-8",
+        max_age=3600,
+    )
+
+
+@app.get("/styles.css")
+async def page_styles(request: Request) -> Response:
+    """Stylesheet for pages built with _page_template."""
+    # Only the URL pages link to (?v=<hash>) is pinned for a year; bare or stale
+    # URLs fall back to a day so they pick up the current stylesheet.
+    versioned = request.query_params.get("v", None) == _PAGE_CSS_VERSION
+    return _cached_asset_response(
+        request,
+        _PAGE_CSS,
+        etag=_PAGE_CSS_ETAG,
+        content_type="text/css; charset=utf-8",
+        max_age=31536000 if versioned else 86400,
+        immutable=versioned,
     )
 
 
 # ---------------------------------------------------------------------------
 # Static asset helpers.
 # ---------------------------------------------------------------------------
+def _read_static_asset(name: str) -> Optional[bytes]:
+    """Read a bundled static file once at import; None when it is missing."""
+    try:
+        return (static_dir / name).read_bytes()
+    except OSError:
+        return None
+
+
+_FAVICON_SVG = _read_static_asset("favicon.svg")
+_FAVICON_SVG_ETAG = _asset_etag(_FAVICON_SVG) if _FAVICON_SVG is not None else ""
+
+
 @app.get("/favicon.ico")
-async def favicon(_: Request) -> Response:
+async def favicon(request: Request) -> Response:
     """Serve the SVG favicon through a conventional .ico route."""
-    favicon_path = static_dir / "favicon.svg"
-    if not favicon_path.exists():
+    if _FAVICON_SVG is None:
         return Response(status_code=404, headers={}, description="")
-    return Response(
-        status_code=200,
-        headers={"content-type": "image/svg+xml"},
-        description=favicon_path.read_text(encoding="utf-8"),
+    return _cached_asset_response(
+        request,
+        _FAVICON_SVG,
+        etag=_FAVICON_SVG_ETAG,
+        content_type="image/svg+xml",
+        max_age=86400,
     )
 
 
@@ -2088,13 +2570,21 @@ async def _handle_photo_upload(
     # Will need to make thumbnails for videos always
     store_originals = True if is_video else bool(user_settings.store_originals_enabled)
 
+    # The caption is the slowest step, so it starts first and runs alongside OCR,
+    # metadata extraction and thumbnailing; it is awaited once those finish.
+    caption_task: Optional[asyncio.Task] = None
+    if do_ai and not ASYNC_PROCESSING:
+        caption_task = asyncio.create_task(
+            _run_ollama(_generate_image_description_with_ollama, image_bytes, filename=filename)
+        )
+
     ocr_text = ""
     make = model = shutter = loc_desc = city = state = country = None
     iso = None
     f_stop = focal = lat = lon = None
     if do_ocr and not ASYNC_PROCESSING:
         try:
-            ocr_text = await asyncio.to_thread(_generate_ocr_with_ollama, image_bytes, filename=filename)
+            ocr_text = await _run_ollama(_generate_ocr_with_ollama, image_bytes, filename=filename)
             extracted = await asyncio.to_thread(extract_upload_metadata, image_bytes)
             if taken_at is None:
                 taken_at = extracted.taken_at
@@ -2133,13 +2623,9 @@ async def _handle_photo_upload(
         )
 
     description = ""
-    if do_ai and not ASYNC_PROCESSING:
+    if caption_task is not None:
         try:
-            description = await asyncio.to_thread(
-                _generate_image_description_with_ollama,
-                image_bytes,
-                filename=filename,
-            )
+            description = await caption_task
         except Exception:
             logger.warning(
                 "upload caption generation skipped user_id=%s filename=%s",
@@ -2686,7 +3172,7 @@ async def shared_photo_view(request: Request) -> Response:
         return Response(status_code=404, headers={}, description="Not found")
     if share.revoked_at is not None:
         return Response(status_code=404, headers={}, description="Not found")
-    if share.expires_at and _as_utc(datetime.fromisoformat(share.expires_at)) <= _utc_now():
+    if share.expires_at and _is_expired(share.expires_at):
         return Response(status_code=404, headers={}, description="Not found")
     record = await db.fetch_image_by_id(share.image_id)
     if not record:
@@ -2694,7 +3180,7 @@ async def shared_photo_view(request: Request) -> Response:
     if record.user_id is None and not record.image_data and not record.thumbnail_data:
         return Response(status_code=404, headers={}, description="Not found")
     owner_id = int(record.user_id) if record.user_id is not None else 0
-    return _photo_view_response(owner_id, record.id, record, allow_thumbnail_fallback=True)
+    return await _photo_view_response(owner_id, record.id, record, allow_thumbnail_fallback=True)
 
 
 # ---------------------------------------------------------------------------
@@ -2900,34 +3386,35 @@ async def search_photos_api(request: Request) -> Response:
 # ---------------------------------------------------------------------------
 @app.get("/api/photos/download")
 async def download_photo_api(request: Request) -> Response:
-    """Return base64 or signed URL for a stored photo."""
+    """Return the stored photo bytes, or a signed URL for B2-backed photos."""
     auth = await _ensure_authenticated(request)
     if isinstance(auth, Response):
         return _json_response({"error": "authentication required"}, status=401)
 
-    raw_photo_id = str(request.query_params.get("photo_id", "")).strip()
-    if not raw_photo_id.isdigit():
+    photo_id = _parse_photo_id(request.query_params.get("photo_id", ""))
+    if photo_id is None:
         return _json_response({"error": "photo_id must be an integer"}, status=400)
 
-    photo_id = int(raw_photo_id)
-
     record = await db.fetch_image_for_access(photo_id, auth.user.id)
     if not record:
         return _json_response({"error": "photo not found"}, status=404)
 
     if record.image_data:
-        return _json_response(
-            {
-                "filename": record.filename,
-                "content_type": record.content_type,
-                "image_base64": base64.b64encode(record.image_data).decode("utf-8"),
-            }
-        )
+        # Raw bytes rather than base64-in-JSON: no encode pass, no string
+        # escaping and a third fewer bytes on the wire.
+        headers = {
+            "content-type": record.content_type,
+            "content-disposition": f"attachment; filename*=UTF-8''{quote(record.filename)}",
+            "x-photo-id": str(record.id),
+        }
+        if record.taken_at:
+            headers["x-taken-at"] = record.taken_at
+        return Response(status_code=200, headers=headers, description=record.image_data)
     if bucket is None:
         return _json_response({"error": "file storage unavailable"}, status=503)
     owner_id = int(record.user_id) if record.user_id is not None else auth.user.id
     file_key = _photo_file_key(owner_id, photo_id, record.filename)
-    signed_url = _get_cached_signed_url(file_key, valid_duration_in_seconds=300)
+    signed_url = await _get_signed_url_async(file_key, valid_duration_in_seconds=300)
     return _json_response(
         {
             "url": signed_url,
@@ -2953,7 +3440,7 @@ async def view_photo(request: Request) -> Response:
         return Response(status_code=404, headers={}, description="Not found")
 
     owner_id = int(record.user_id) if record.user_id is not None else auth.user.id
-    return _photo_view_response(owner_id, photo_id, record)
+    return await _photo_view_response(owner_id, photo_id, record)
 
 
 @app.get("/api/photos/thumb")
@@ -3025,7 +3512,7 @@ async def view_photo_thumbnail(request: Request) -> Response:
                 exc_info=True,
             )
     owner_id = int(record.user_id) if record.user_id is not None else auth.user.id
-    return _photo_view_response(owner_id, photo_id, record)
+    return await _photo_view_response(owner_id, photo_id, record)
 
 
 # ---------------------------------------------------------------------------
@@ -3039,15 +3526,14 @@ async def delete_photo_api(request: Request) -> Response:
     if not _verify_api_csrf(request):
         return _json_response({"error": "CSRF validation failed"}, status=403)
     payload = _json_data(request)
-    photo_id_raw = str(payload.get("photo_id", "")).strip()
-    if not photo_id_raw.isdigit():
+    photo_id = _parse_photo_id(payload.get("photo_id", ""))
+    if photo_id is None:
         return _json_response({"error": "photo_id must be an integer"}, status=400)
     if payload.get("confirm_delete") is not True:
         return _json_response(
             {"error": "confirm_delete=true is required to delete a photo"},
             status=400,
         )
-    photo_id = int(photo_id_raw)
     logger.info("delete requested user_id=%s photo_id=%s", auth.user.id, photo_id)
     record = await db.fetch_image_for_user(photo_id, auth.user.id)
     if not record:
@@ -3126,7 +3612,8 @@ async def login_post(request: Request) -> Response:
     email = (form.get("email") or "").strip().lower()
     password = form.get("password") or ""
     next_path = _normalize_redirect_path(form.get("next"))
-    csrf_cookie = _get_cookie_value(request, CSRF_COOKIE_NAME)
+    cookies = _request_cookies(request)
+    csrf_cookie = cookies.get(CSRF_COOKIE_NAME)
     csrf_form = form.get("csrf_token")
     errors = []
     csrf_valid = verify_csrf_token(csrf_cookie, csrf_form)
@@ -3137,7 +3624,7 @@ async def login_post(request: Request) -> Response:
     if not password:
         errors.append("Password is required.")
     if errors:
-        csrf_token = generate_csrf_token()
+        csrf_token, set_csrf = _get_or_create_csrf_token(request)
         template_response = jinja_template.render_template(
             "login/Login.html",
             request=request,
@@ -3151,11 +3638,13 @@ async def login_post(request: Request) -> Response:
             status_code=200,
             headers=template_response.headers,
         )
-        _set_csrf_cookie(response, csrf_token)
+        _apply_common_cookies(response, csrf_token=csrf_token, set_csrf=set_csrf)
         return response
     user = await db.fetch_user_by_email(email)
-    if not user or not verify_password(password, user.password_hash):
-        csrf_token = generate_csrf_token()
+    # Argon2 takes ~0.2s of CPU per check (libargon2 via argon2-cffi releases the
+    # GIL), so it runs in a worker thread instead of stalling the event loop.
+    if not user or not await asyncio.to_thread(verify_password, password, user.password_hash):
+        csrf_token, set_csrf = _get_or_create_csrf_token(request)
         template_response = jinja_template.render_template(
             "login/Login.html",
             request=request,
@@ -3170,26 +3659,30 @@ async def login_post(request: Request) -> Response:
             status_code=401,
             headers=template_response.headers,
         )
-        _set_csrf_cookie(response, csrf_token)
+        _apply_common_cookies(response, csrf_token=csrf_token, set_csrf=set_csrf)
         return response
-    existing_token = _get_cookie_value(request, SESSION_COOKIE_NAME)
-    if existing_token:
-        await db.revoke_session_by_hash(hash_session_token(existing_token), _now_iso())
+    existing_token = cookies.get(SESSION_COOKIE_NAME)
+    previous_token_hash = hash_session_token(existing_token) if existing_token else None
+    if previous_token_hash is not None:
+        _evict_cached_auth(previous_token_hash)
     session_token = generate_session_token()
     user_agent = request.headers.get("user-agent")
     ip_addr = getattr(request, "ip_addr", None) or request.headers.get(
         "x-forwarded-for"
     )
-    expires_at = (
-        _utc_now() + timedelta(seconds=session_expiration())
-    ).isoformat()
-    await db.create_session(
+    expires_at = (_utc_now() + _SESSION_LIFETIME).isoformat()
+    # Revoking the old cookie's session and creating the new one share a commit.
+    await db.rotate_session(
+        previous_token_hash=previous_token_hash,
         user_id=user.id,
         token_hash=session_token.token_hash,
         expires_at=expires_at,
+        revoked_at=_now_iso(),
         user_agent=user_agent,
         ip_address=ip_addr,
     )
+    if previous_token_hash is not None:
+        _evict_cached_auth(previous_token_hash)
     redirect_destination = next_path if next_path.strip() else "/dashboard"
     response = _redirect(redirect_destination)
     # Store the session in a httponly cookie so browsers send it automatically.
@@ -3246,7 +3739,7 @@ async def register_post(request: Request) -> Response:
     if password != confirm:
         errors.append("Password confirmation does not match.")
     if errors:
-        csrf_token = generate_csrf_token()
+        csrf_token, set_csrf = _get_or_create_csrf_token(request)
         template_response = jinja_template.render_template(
             "register/Register.html",
             request=request,
@@ -3259,15 +3752,15 @@ async def register_post(request: Request) -> Response:
             status_code=200,
             headers=template_response.headers,
         )
-        _set_csrf_cookie(response, csrf_token)
+        _apply_common_cookies(response, csrf_token=csrf_token, set_csrf=set_csrf)
         return response
     try:
-        password_hash = hash_password(password)
+        password_hash = await asyncio.to_thread(hash_password, password)
         await db.create_user(username, email, password_hash)
     except aiosqlite.IntegrityError:
         # The DB enforces uniqueness so a duplicate inserts will raise here.
         errors.append("That username or email is already registered.")
-        csrf_token = generate_csrf_token()
+        csrf_token, set_csrf = _get_or_create_csrf_token(request)
         template_response = jinja_template.render_template(
             "register/Register.html",
             request=request,
@@ -3280,7 +3773,7 @@ async def register_post(request: Request) -> Response:
             status_code=200,
             headers=template_response.headers,
         )
-        _set_csrf_cookie(response, csrf_token)
+        _apply_common_cookies(response, csrf_token=csrf_token, set_csrf=set_csrf)
         return response
     return _redirect_with_next("/login", query=urlencode({"registered": "1"}))
 
@@ -3289,15 +3782,16 @@ async def register_post(request: Request) -> Response:
 async def logout(request: Request) -> Response:
     """Revoke the session cookie and return to the public landing page."""
     form = _form_data(request)
-    csrf_cookie = _get_cookie_value(request, CSRF_COOKIE_NAME)
+    cookies = _request_cookies(request)
+    csrf_cookie = cookies.get(CSRF_COOKIE_NAME)
     csrf_form = form.get("csrf_token")
     if not verify_csrf_token(csrf_cookie, csrf_form):
         response = _redirect("/")
         _clear_session_cookie(response)
         return response
-    token = _get_cookie_value(request, SESSION_COOKIE_NAME)
+    token = cookies.get(SESSION_COOKIE_NAME)
     if token:
-        await db.revoke_session_by_hash(hash_session_token(token), _now_iso())
+        await _revoke_session_token(token)
     response = _redirect("/")
     _clear_session_cookie(response)
     return response
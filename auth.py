@@ -18,6 +18,7 @@ from dataclasses import dataclass
 from datetime import timedelta
 from typing import Any, Dict
 
+from argon2 import PasswordHasher
 from passlib.context import CryptContext
 
 SESSION_COOKIE_NAME = "taglens_session"
@@ -32,6 +33,12 @@ pwd_context = CryptContext(
     deprecated="auto",
 )
 
+# New hashes and argon2 verification go straight to argon2-cffi; passlib is
+# only consulted for legacy PBKDF2/bcrypt hashes. The defaults (t=3, 64 MiB,
+# p=4, argon2id) match what passlib produced, so stored hashes stay valid.
+_argon2_hasher = PasswordHasher()
+_ARGON2_PREFIX = "$argon2"
+
 
 @dataclass
 class SessionToken:
@@ -71,7 +78,9 @@ def verify_csrf_token(cookie_token: str | None, form_token: str | None) -> bool:
     """Compare CSRF tokens using constant time comparison."""
     if not cookie_token or not form_token:
         return False
-    return secrets.compare_digest(cookie_token, form_token)
+    # Compare bytes: str inputs with non-ASCII characters make compare_digest
+    # raise TypeError, which would turn a forged form field into a 500.
+    return secrets.compare_digest(cookie_token.encode("utf-8"), form_token.encode("utf-8"))
 
 
 def session_expiration(max_age: timedelta | int = DEFAULT_MAX_AGE) -> int:
@@ -80,13 +89,15 @@ def session_expiration(max_age: timedelta | int = DEFAULT_MAX_AGE) -> int:
 
 
 def hash_password(plain: str) -> str:
-    """Wrap passlib's bcrypt hash generator."""
-    return pwd_context.hash(plain)
+    """Hash a new password with Argon2id."""
+    return _argon2_hasher.hash(plain)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
     """Compare a plaintext password against the stored hash."""
     try:
+        if hashed.startswith(_ARGON2_PREFIX):
+            return _argon2_hasher.verify(hashed, plain)
         return pwd_context.verify(plain, hashed)
     except Exception:
         return False
@@ -10,9 +10,10 @@ Authorship (git history, mapped to real names):
 
 from __future__ import annotations
 
+import asyncio
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 import os
 from pathlib import Path
 from typing import Any, AsyncIterator, Optional, Sequence
@@ -33,8 +34,40 @@ def _resolve_db_path() -> Path:
 
 DB_PATH = _resolve_db_path()
 
+# Per-connection settings applied whenever the pool opens a connection.
+# journal_mode is persistent and is set once in Database.initialize().
+_CONNECTION_PRAGMAS = (
+    # Enforce relational integrity at the SQLite layer.
+    "PRAGMA foreign_keys = ON;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA cache_size = -64000;",
+    # Memory-map up to 256 MiB so hot pages are read without a copy into the
+    # per-connection page cache; readers share the OS page cache mapping.
+    "PRAGMA mmap_size = 268435456;",
+)
 
-@dataclass
+
+# sqlite3 keeps an LRU of compiled statements per connection (128 by
+# default). This module issues close to that many distinct statements plus
+# dynamically built filters, so leave headroom to keep hot queries prepared.
+_STATEMENT_CACHE_SIZE = 512
+
+
+def _utc_now_iso() -> str:
+    """Current UTC time in the naive ISO-8601 form stored in ``*_at`` columns."""
+    # datetime.utcnow() is deprecated from Python 3.12; keep its output format.
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def _default_pool_size() -> int:
+    raw = os.getenv("TAGLENS_DB_POOL_SIZE")
+    if raw and raw.isdigit() and int(raw) > 0:
+        return int(raw)
+    return min(8, os.cpu_count() or 1)
+
+
+@dataclass(slots=True)
 class UserRecord:
     id: int
     username: str
@@ -43,7 +76,7 @@ class UserRecord:
     created_at: str
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionRecord:
     id: int
     user_id: int
@@ -56,7 +89,7 @@ class SessionRecord:
     revoked_at: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageRecord:
     id: int
     user_id: Optional[int]
@@ -85,7 +118,7 @@ class ImageRecord:
     country: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageMetadataRecord:
     id: int
     image_id: int
@@ -113,7 +146,7 @@ class ImageMetadataRecord:
     updated_at: str
 
 
-@dataclass
+@dataclass(slots=True)
 class FaceEmbeddingRecord:
     user_id: int
     tag: str
@@ -122,7 +155,7 @@ class FaceEmbeddingRecord:
     updated_at: str
 
 
-@dataclass
+@dataclass(slots=True)
 class UserSettingsRecord:
     user_id: int
     ai_descriptions_enabled: int
@@ -134,7 +167,7 @@ class UserSettingsRecord:
     updated_at: str
 
 
-@dataclass
+@dataclass(slots=True)
 class JobRecord:
     id: int
     user_id: int
@@ -148,7 +181,7 @@ class JobRecord:
     error: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class PhotoShareRecord:
     id: int
     image_id: int
@@ -162,17 +195,99 @@ class PhotoShareRecord:
 class Database:
     """Lightweight wrapper around aiosqlite for user persistence."""
 
-    def __init__(self, db_path: Path = DB_PATH) -> None:
+    def __init__(self, db_path: Path = DB_PATH, *, pool_size: Optional[int] = None) -> None:
         self.db_path = db_path
+        self.pool_size = pool_size or _default_pool_size()
+        # Connections are opened lazily and reused: one writer (SQLite allows a
+        # single writer at a time) plus up to ``pool_size`` readers, which WAL
+        # lets run concurrently with the writer.
+        self._pool_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._writer_lock: Optional[asyncio.Lock] = None
+        self._idle_readers: Optional[asyncio.Queue[aiosqlite.Connection]] = None
+        self._readers: list[aiosqlite.Connection] = []
+        # Reader slots claimed so far, counted before the connect is awaited so
+        # concurrent checkouts cannot open more than ``pool_size`` readers.
+        self._reader_slots = 0
+
+    async def _open_connection(self, *, read_only: bool = False) -> aiosqlite.Connection:
+        """Open a pooled connection with the shared per-connection pragmas."""
+        conn = await aiosqlite.connect(self.db_path, cached_statements=_STATEMENT_CACHE_SIZE)
+        conn.row_factory = aiosqlite.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            await conn.execute(pragma)
+        if read_only:
+            # Readers never write; make SQLite reject it so a misrouted
+            # statement fails loudly instead of racing the writer.
+            await conn.execute("PRAGMA query_only = ON;")
+        return conn
+
+    def _ensure_pool(self) -> None:
+        """Bind pool primitives to the running loop, resetting on loop changes."""
+        loop = asyncio.get_running_loop()
+        if self._pool_loop is loop:
+            return
+        stale = self._readers + ([self._writer] if self._writer else [])
+        self._pool_loop = loop
+        self._writer = None
+        self._writer_lock = asyncio.Lock()
+        self._idle_readers = asyncio.Queue()
+        self._readers = []
+        self._reader_slots = 0
+        for conn in stale:
+            conn.stop()
 
     @asynccontextmanager
     async def _connection(self) -> AsyncIterator[aiosqlite.Connection]:
-        """Open a connection with foreign-key support enabled."""
-        async with aiosqlite.connect(self.db_path) as conn:
-            conn.row_factory = aiosqlite.Row
-            # Enforce relational integrity at the SQLite layer.
-            await conn.execute("PRAGMA foreign_keys = ON;")
+        """Check out the shared writer connection for a read/write unit of work."""
+        self._ensure_pool()
+        assert self._writer_lock is not None
+        async with self._writer_lock:
+            if self._writer is None:
+                self._writer = await self._open_connection()
+            conn = self._writer
+            try:
+                yield conn
+            finally:
+                # Never leak an uncommitted transaction to the next caller.
+                if conn.in_transaction:
+                    await conn.rollback()
+
+    @asynccontextmanager
+    async def _read_connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Check out a pooled reader connection for SELECT-only work."""
+        self._ensure_pool()
+        idle = self._idle_readers
+        assert idle is not None
+        try:
+            conn = idle.get_nowait()
+        except asyncio.QueueEmpty:
+            if self._reader_slots < self.pool_size:
+                self._reader_slots += 1
+                try:
+                    conn = await self._open_connection(read_only=True)
+                except BaseException:
+                    self._reader_slots -= 1
+                    raise
+                self._readers.append(conn)
+            else:
+                conn = await idle.get()
+        try:
             yield conn
+        finally:
+            if conn.in_transaction:
+                await conn.rollback()
+            idle.put_nowait(conn)
+
+    async def close(self) -> None:
+        """Close every pooled connection; the pool reopens lazily if reused."""
+        conns = self._readers + ([self._writer] if self._writer else [])
+        self._pool_loop = None
+        self._writer = None
+        self._readers = []
+        self._reader_slots = 0
+        for conn in conns:
+            await conn.close()
 
     async def initialize(self) -> None:
         """Create directories and ensure the users table exists."""
@@ -395,6 +510,14 @@ class Database:
             await conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_jobs_image_id ON jobs(image_id)"
             )
+            # SQLite does not index foreign keys; without these, deleting a
+            # user scans every session and job row to apply ON DELETE CASCADE.
+            await conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id)"
+            )
+            await conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_user_id ON jobs(user_id)"
+            )
             await conn.commit()
 
     async def healthcheck(self) -> bool:
@@ -405,7 +528,7 @@ class Database:
         to confirm the file is reachable and SQLite can execute a statement.
         """
         try:
-            async with self._connection() as conn:
+            async with self._read_connection() as conn:
                 await conn.execute("SELECT 1;")
             return True
         except Exception:
@@ -415,7 +538,7 @@ class Database:
         self, query: str, params: Sequence[Any]
     ) -> Optional[aiosqlite.Row]:
         """Execute a single-row SELECT statement with given parameters."""
-        async with self._connection() as conn:
+        async with self._read_connection() as conn:
             cursor = await conn.execute(query, params)
             row = await cursor.fetchone()
             await cursor.close()
@@ -427,7 +550,7 @@ class Database:
             "SELECT id, username, email, password_hash, created_at FROM users WHERE email = ?",
             (email.lower(),),
         )
-        return UserRecord(**row) if row else None
+        return UserRecord(*row) if row else None
 
     async def fetch_user_by_id(self, user_id: int) -> Optional[UserRecord]:
         """Retrieve a user record directly from its primary key."""
@@ -435,7 +558,7 @@ class Database:
             "SELECT id, username, email, password_hash, created_at FROM users WHERE id = ?",
             (user_id,),
         )
-        return UserRecord(**row) if row else None
+        return UserRecord(*row) if row else None
 
     async def fetch_image_by_id(self, image_id: int) -> Optional[ImageRecord]:
         row = await self.fetch_one(
@@ -470,7 +593,7 @@ class Database:
         self, username: str, email: str, password_hash: str
     ) -> UserRecord:
         """Insert a new user and return the constructed dataclass."""
-        created_at = datetime.utcnow().isoformat()
+        created_at = _utc_now_iso()
         async with self._connection() as conn:
             cursor = await conn.execute(
                 """
@@ -528,7 +651,7 @@ class Database:
         return UserSettingsRecord(**row) if row else None
 
     async def list_users_with_retention(self) -> list[tuple[int, int]]:
-        async with self._connection() as conn:
+        async with self._read_connection() as conn:
             cursor = await conn.execute(
                 """
                 SELECT user_id, retention_days
@@ -545,7 +668,7 @@ class Database:
         settings = await self.fetch_user_settings(user_id)
         if settings:
             return settings
-        now = datetime.utcnow().isoformat()
+        now = _utc_now_iso()
         async with self._connection() as conn:
             await conn.execute(
                 """
@@ -580,7 +703,7 @@ class Database:
         retention_days: Optional[int] = None,
     ) -> UserSettingsRecord:
         current = await self.ensure_user_settings(user_id)
-        updated_at = datetime.utcnow().isoformat()
+        updated_at = _utc_now_iso()
         next_ai = int(ai_descriptions_enabled) if ai_descriptions_enabled is not None else current.ai_descriptions_enabled
         next_ocr = int(ocr_enabled) if ocr_enabled is not None else current.ocr_enabled
         next_faces = int(face_recognition_enabled) if face_recognition_enabled is not None else current.face_recognition_enabled
@@ -623,7 +746,7 @@ class Database:
         kind: str,
         payload_json: str,
     ) -> int:
-        created_at = datetime.utcnow().isoformat()
+        created_at = _utc_now_iso()
         async with self._connection() as conn:
             cursor = await conn.execute(
                 """
@@ -640,7 +763,7 @@ class Database:
 
     async def claim_next_job(self, *, kind: str) -> Optional[JobRecord]:
         """Atomically claim the next queued job for processing."""
-        now = datetime.utcnow().isoformat()
+        now = _utc_now_iso()
         async with self._connection() as conn:
             await conn.execute("BEGIN IMMEDIATE;")
             cursor = await conn.execute(
@@ -679,7 +802,7 @@ class Database:
         return JobRecord(**data)
 
     async def complete_job(self, job_id: int) -> None:
-        now = datetime.utcnow().isoformat()
+        now = _utc_now_iso()
         async with self._connection() as conn:
             await conn.execute(
                 """
@@ -692,7 +815,7 @@ class Database:
             await conn.commit()
 
     async def fail_job(self, job_id: int, error: str) -> None:
-        now = datetime.utcnow().isoformat()
+        now = _utc_now_iso()
         async with self._connection() as conn:
             await conn.execute(
                 """
@@ -705,7 +828,7 @@ class Database:
             await conn.commit()
 
     async def list_jobs_for_image(self, image_id: int, *, limit: int = 10) -> list[JobRecord]:
-        async with self._connection() as conn:
+        async with self._read_connection() as conn:
             cursor = await conn.execute(
                 """
                 SELECT id, user_id, image_id, kind, payload_json, status,
@@ -777,7 +900,7 @@ class Database:
         token_prefix: str,
         expires_at: Optional[str],
     ) -> PhotoShareRecord:
-        created_at = datetime.utcnow().isoformat()
+        created_at = _utc_now_iso()
         async with self._connection() as conn:
             cursor = await conn.execute(
                 """
@@ -808,7 +931,7 @@ class Database:
         )
 
     async def list_photo_shares_for_image(self, image_id: int) -> list[PhotoShareRecord]:
-        async with self._connection() as conn:
+        async with self._read_connection() as conn:
             cursor = await conn.execute(
                 """
                 SELECT id, image_id, token_hash, token_prefix, expires_at, revoked_at, created_at
@@ -839,7 +962,7 @@ class Database:
         image_id: int,
         token_prefix: Optional[str] = None,
     ) -> int:
-        revoked_at = datetime.utcnow().isoformat()
+        revoked_at = _utc_now_iso()
         async with self._connection() as conn:
             if token_prefix:
                 cursor = await conn.execute(
@@ -874,8 +997,40 @@ class Database:
         ip_address: Optional[str] = None,
     ) -> SessionRecord:
         """Insert a new session row for a user."""
-        created_at = datetime.utcnow().isoformat()
+        return await self.rotate_session(
+            previous_token_hash=None,
+            user_id=user_id,
+            token_hash=token_hash,
+            expires_at=expires_at,
+            user_agent=user_agent,
+            ip_address=ip_address,
+        )
+
+    async def rotate_session(
+        self,
+        *,
+        previous_token_hash: Optional[str],
+        user_id: int,
+        token_hash: str,
+        expires_at: str,
+        revoked_at: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        ip_address: Optional[str] = None,
+    ) -> SessionRecord:
+        """Revoke the previous session (if any) and insert a new one in one commit.
+
+        ``revoked_at`` is supplied by the caller, as with ``revoke_session_by_hash``,
+        so every revocation path stores the same timestamp format.
+        """
+        if previous_token_hash is not None and revoked_at is None:
+            raise ValueError("revoked_at is required when rotating a previous session")
+        created_at = _utc_now_iso()
         async with self._connection() as conn:
+            if previous_token_hash is not None:
+                await conn.execute(
+                    "UPDATE sessions SET revoked_at = ? WHERE token_hash = ?",
+                    (revoked_at, previous_token_hash),
+                )
             cursor = await conn.execute(
                 """
                 INSERT INTO sessions (
@@ -942,7 +1097,7 @@ class Database:
         country: Optional[str] = None,
     ) -> ImageRecord:
         """Insert processed image metadata and return the constructed dataclass."""
-        created_at = datetime.utcnow().isoformat()
+        created_at = _utc_now_iso()
         faces_json_enc = encrypt_text(faces_json)
         ocr_text_enc = encrypt_text(ocr_text)
         ai_description_enc = encrypt_text(ai_description)
@@ -1032,7 +1187,12 @@ class Database:
         limit: Optional[int] = None,
         offset: int = 0,
     ) -> list[ImageRecord]:
-        """Return all images owned by the given user with configurable sorting."""
+        """Return all images owned by the given user with configurable sorting.
+
+        Listing callers only need text fields, so the original and thumbnail
+        BLOBs are not read; records come back with ``image_data`` and
+        ``thumbnail_data`` set to None. Use fetch_image_for_user for bytes.
+        """
         sort_clause = "created_at"
         if sort_by == "taken":
             sort_clause = "COALESCE(taken_at, created_at)"
@@ -1042,7 +1202,7 @@ class Database:
         if limit is not None:
             pagination_clause = "LIMIT ? OFFSET ?"
             params.extend([limit, max(0, int(offset))])
-        async with self._connection() as conn:
+        async with self._read_connection() as conn:
             cursor = await conn.execute(
                 f"""
                 SELECT
@@ -1053,8 +1213,6 @@ class Database:
                     ocr_text,
                     ai_description,
                     content_type,
-                    image_data,
-                    thumbnail_data,
                     thumbnail_content_type,
                     taken_at,
                     created_at,
@@ -1081,7 +1239,7 @@ class Database:
             await cursor.close()
         records: list[ImageRecord] = []
         for row in rows:
-            record = ImageRecord(**row)
+            record = ImageRecord(**row, image_data=None, thumbnail_data=None)
             record.faces_json = decrypt_text(record.faces_json)
             record.ocr_text = decrypt_text(record.ocr_text)
             record.ai_description = decrypt_text(record.ai_description)
@@ -1096,7 +1254,7 @@ class Database:
         limit: int = 200,
     ) -> list[tuple[int, str]]:
         """Return (image_id, filename) for images older than cutoff by created_at."""
-        async with self._connection() as conn:
+        async with self._read_connection() as conn:
             cursor = await conn.execute(
                 """
                 SELECT id, filename
@@ -1219,7 +1377,7 @@ class Database:
         offset: int = 0,
     ) -> list[ImageRecord]:
         """List images shared *to* a user via ACL (not share links)."""
-        async with self._connection() as conn:
+        async with self._read_connection() as conn:
             cursor = await conn.execute(
                 """
                 SELECT
@@ -1257,7 +1415,7 @@ class Database:
         return records
 
     async def grant_photo_acl(self, *, image_id: int, grantee_user_id: int) -> None:
-        created_at = datetime.utcnow().isoformat()
+        created_at = _utc_now_iso()
         async with self._connection() as conn:
             await conn.execute(
                 """
@@ -1283,7 +1441,7 @@ class Database:
         return int(changed)
 
     async def list_photo_acl(self, *, image_id: int) -> list[dict[str, Any]]:
-        async with self._connection() as conn:
+        async with self._read_connection() as conn:
             cursor = await conn.execute(
                 """
                 SELECT grantee_user_id, permission, created_at
@@ -1298,7 +1456,7 @@ class Database:
         return [dict(row) for row in rows]
 
     async def list_photo_acl_with_users(self, *, image_id: int) -> list[dict[str, Any]]:
-        async with self._connection() as conn:
+        async with self._read_connection() as conn:
             cursor = await conn.execute(
                 """
                 SELECT
@@ -1391,7 +1549,7 @@ class Database:
         file_size_mb: Optional[float],
         taken_at: Optional[str],
     ) -> None:
-        now = datetime.utcnow().isoformat()
+        now = _utc_now_iso()
         async with self._connection() as conn:
             await conn.execute(
                 """
@@ -1482,7 +1640,7 @@ class Database:
             await conn.commit()
 
     async def list_face_embeddings_for_user(self, user_id: int) -> list[FaceEmbeddingRecord]:
-        async with self._connection() as conn:
+        async with self._read_connection() as conn:
             cursor = await conn.execute(
                 """
                 SELECT user_id, tag, embedding_json, samples_count, updated_at
@@ -1504,36 +1662,31 @@ class Database:
     async def upsert_face_embedding_for_user(
         self, user_id: int, tag: str, embedding_json: str
     ) -> None:
-        now = datetime.utcnow().isoformat()
-        embedding_json_enc = encrypt_text(embedding_json)
+        await self.upsert_face_embeddings_for_user(user_id, [(tag, embedding_json)])
+
+    async def upsert_face_embeddings_for_user(
+        self, user_id: int, embeddings: Sequence[tuple[str, str]]
+    ) -> None:
+        """Insert or update many ``(tag, embedding_json)`` rows in one transaction."""
+        if not embeddings:
+            return
+        now = _utc_now_iso()
+        rows = [
+            (user_id, tag, encrypt_text(embedding_json), now)
+            for tag, embedding_json in embeddings
+        ]
         async with self._connection() as conn:
-            row_cursor = await conn.execute(
+            await conn.executemany(
                 """
-                SELECT embedding_json, samples_count
-                FROM face_embeddings
-                WHERE user_id = ? AND tag = ?
+                INSERT INTO face_embeddings (user_id, tag, embedding_json, samples_count, updated_at)
+                VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT(user_id, tag) DO UPDATE SET
+                    embedding_json = excluded.embedding_json,
+                    samples_count = samples_count + 1,
+                    updated_at = excluded.updated_at
                 """,
-                (user_id, tag),
+                rows,
             )
-            existing = await row_cursor.fetchone()
-            await row_cursor.close()
-            if existing is None:
-                await conn.execute(
-                    """
-                    INSERT INTO face_embeddings (user_id, tag, embedding_json, samples_count, updated_at)
-                    VALUES (?, ?, ?, 1, ?)
-                    """,
-                    (user_id, tag, embedding_json_enc, now),
-                )
-            else:
-                await conn.execute(
-                    """
-                    UPDATE face_embeddings
-                    SET embedding_json = ?, samples_count = samples_count + 1, updated_at = ?
-                    WHERE user_id = ? AND tag = ?
-                    """,
-                    (embedding_json_enc, now, user_id, tag),
-                )
             await conn.commit()
 
     async def fetch_session_by_token_hash(
@@ -1549,7 +1702,31 @@ class Database:
             """,
             (token_hash,),
         )
-        return SessionRecord(**row) if row else None
+        return SessionRecord(*row) if row else None
+
+    async def fetch_session_and_user_by_token_hash(
+        self, token_hash: str
+    ) -> Optional[tuple[SessionRecord, UserRecord]]:
+        """Retrieve a session and its owning user in a single query."""
+        row = await self.fetch_one(
+            """
+            SELECT s.id, s.user_id, s.token_hash, s.created_at, s.expires_at,
+                   s.last_seen_at, s.user_agent, s.ip_address, s.revoked_at,
+                   u.username, u.email, u.password_hash,
+                   u.created_at AS user_created_at
+            FROM sessions AS s
+            JOIN users AS u ON u.id = s.user_id
+            WHERE s.token_hash = ?
+            """,
+            (token_hash,),
+        )
+        if not row:
+            return None
+        # Columns are selected in dataclass field order, so both records are
+        # built positionally rather than through per-name Row lookups.
+        session = SessionRecord(*row[:9])
+        user = UserRecord(row[1], *row[9:])
+        return session, user
 
     async def touch_session(self, session_id: int, last_seen_at: str) -> None:
         """Update the session activity timestamp."""
@@ -1560,6 +1737,17 @@ class Database:
             )
             await conn.commit()
 
+    async def touch_sessions(self, touches: Sequence[tuple[int, str]]) -> None:
+        """Update activity timestamps for many sessions in one transaction."""
+        if not touches:
+            return
+        async with self._connection() as conn:
+            await conn.executemany(
+                "UPDATE sessions SET last_seen_at = ? WHERE id = ?",
+                [(last_seen_at, session_id) for session_id, last_seen_at in touches],
+            )
+            await conn.commit()
+
     async def revoke_session(self, session_id: int, revoked_at: str) -> None:
         """Mark a session as revoked."""
         async with self._connection() as conn:
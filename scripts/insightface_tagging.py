@@ -14,6 +14,11 @@ try:
 except ImportError:  # Optional dependency - gracefully handle if not installed
     FaceAnalysis = None
 
+try:
+    import orjson
+except ImportError:  # Optional dependency - stdlib json is used instead
+    orjson = None
+
 # Global cache for the face analyzer instance to avoid reinitializing on every call
 _FACE_ANALYZER: Any = None
 
@@ -27,8 +32,13 @@ def _safe_parse_faces(faces_json: str) -> list[dict]:
     Returns:
         List of face dictionaries, or empty list if parsing fails or input is invalid
     """
+    # Most photos have no faces; skip the parser for the stored empty list.
+    if not faces_json or faces_json == "[]":
+        return []
     try:
-        parsed = json.loads(faces_json)
+        # Stored faces carry 512-float embeddings, so the C parser matters when
+        # a photo list decodes every row.
+        parsed = orjson.loads(faces_json) if orjson is not None else json.loads(faces_json)
     except (TypeError, ValueError):
         return []
     return parsed if isinstance(parsed, list) else []
@@ -334,7 +344,15 @@ async def detect_and_tag_faces_for_user(user_id: int, image_bytes: bytes, db: An
                 known_tags.add(tag)
         known_faces = list(by_tag.values())
         # Migrate aggregated embeddings to new index for faster future lookups
-        if hasattr(db, "upsert_face_embedding_for_user"):
+        if hasattr(db, "upsert_face_embeddings_for_user"):
+            await db.upsert_face_embeddings_for_user(
+                user_id,
+                [
+                    (known["tag"], _serialize_embedding(known["embedding"]))
+                    for known in known_faces
+                ],
+            )
+        elif hasattr(db, "upsert_face_embedding_for_user"):
             for known in known_faces:
                 await db.upsert_face_embedding_for_user(
                     user_id,
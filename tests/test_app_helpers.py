@@ -0,0 +1,403 @@
+"""
+Unit tests for the request and page helpers in app.py.
+
+These exercise the small pure functions the handlers are built on (page shell,
+cookie and form parsing, session caching and touch batching) without starting a server.
+"""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+import os
+import stat
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+import pytest
+
+import app as app_module
+from database import SessionRecord, UserRecord
+
+
+def test_page_template_links_shared_stylesheet() -> None:
+    """Pages reference /styles.css instead of inlining the stylesheet."""
+    html = app_module._page_template(title="Hello <World>", body="<p>body</p>")
+
+    assert f'<link rel="stylesheet" href="/styles.css?v={app_module._PAGE_CSS_VERSION}">' in html
+    assert "<style>" not in html
+    assert "Hello &lt;World&gt;" in html
+    assert "<p>body</p>" in html
+
+
+def test_cached_jinja_template_uses_private_bytecode_dir() -> None:
+    """Bytecode lands in Jinja's per-user 0700 directory, not a shared fixed path."""
+    cache = app_module.jinja_template.env.bytecode_cache
+    assert cache is not None
+    mode = os.stat(cache.directory).st_mode
+    assert stat.S_IMODE(mode) & 0o077 == 0
+    assert os.stat(cache.directory).st_uid == os.getuid()
+
+
+def test_jinja_pages_autoescape_request_values() -> None:
+    """Reflected values such as ?next= cannot break out of their attribute."""
+    html = app_module.jinja_template.render(
+        "login/Login.html",
+        request=None,
+        title="Sign in",
+        next_path='/"><script>alert(1)</script>',
+        csrf_token="token",
+        messages=["<b>bad</b>"],
+    )
+
+    assert "<script>alert(1)</script>" not in html
+    assert 'value="/&#34;&gt;&lt;script&gt;' in html
+    assert "&lt;b&gt;bad&lt;/b&gt;" in html
+    assert "__taglens_autoescape_" in app_module.jinja_template.env.bytecode_cache.pattern
+
+
+def test_get_cookie_value_keeps_first_match_and_strips_values() -> None:
+    """Cookie lookups honour first-wins order and trim padding around values."""
+    header = " taglens_csrf= abc ; flag; taglens_session=tok=en ;taglens_csrf=dup"
+    request = SimpleNamespace(headers={"cookie": header})
+
+    assert app_module._get_cookie_value(request, "taglens_session") == "tok=en"
+    assert app_module._get_cookie_value(request, "taglens_csrf") == "abc"
+    assert app_module._get_cookie_value(request, "flag") is None
+    assert app_module._get_cookie_value(SimpleNamespace(headers={}), "taglens_csrf") is None
+
+
+def test_parse_cookie_header_is_not_memoized() -> None:
+    """Cookie headers carry secrets, so the parser must not retain them."""
+    assert not hasattr(app_module._parse_cookie_header, "cache_info")
+
+
+class _TouchRecorder:
+    """Fake database that records batched session touches and close() calls."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[tuple[int, str]]] = []
+        self.closed = False
+
+    async def touch_sessions(self, touches) -> None:
+        self.batches.append(list(touches))
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def touch_db(monkeypatch: pytest.MonkeyPatch) -> _TouchRecorder:
+    fake = _TouchRecorder()
+    monkeypatch.setattr(app_module, "db", fake)
+    monkeypatch.setattr(app_module, "_pending_session_touches", {})
+    monkeypatch.setattr(app_module, "_session_touch_task", None)
+    monkeypatch.setattr(app_module, "_last_session_touch_flush", app_module.time.monotonic())
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_session_touches_are_debounced_then_flushed_in_one_batch(
+    touch_db: _TouchRecorder,
+) -> None:
+    """Touches inside the flush window only buffer; the next one past it writes all."""
+    app_module._queue_session_touch(1)
+    app_module._queue_session_touch(2)
+    app_module._queue_session_touch(1)
+    await asyncio.sleep(0)
+    assert touch_db.batches == []
+    assert app_module._session_touch_task is None
+
+    app_module._last_session_touch_flush -= app_module.SESSION_TOUCH_FLUSH_SECONDS + 1
+    app_module._queue_session_touch(3)
+    task = app_module._session_touch_task
+    assert task is not None
+    app_module._queue_session_touch(4)
+    assert app_module._session_touch_task is task
+    await task
+
+    assert len(touch_db.batches) == 1
+    assert sorted(session_id for session_id, _ in touch_db.batches[0]) == [1, 2, 3, 4]
+    assert app_module._pending_session_touches == {}
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_buffered_session_touches(touch_db: _TouchRecorder) -> None:
+    """Shutdown writes whatever is still buffered before closing the database."""
+    app_module._queue_session_touch(7)
+    assert touch_db.batches == []
+
+    await app_module._shutdown_database()
+
+    assert [[session_id for session_id, _ in batch] for batch in touch_db.batches] == [[7]]
+    assert touch_db.closed
+
+
+def test_json_response_body_is_encoded_bytes() -> None:
+    """JSON responses hand Robyn bytes directly instead of a decoded str."""
+    response = app_module._json_response({"name": "café", "ids": [1, 2]}, status=201)
+
+    assert isinstance(response.description, bytes)
+    assert json.loads(response.description) == {"name": "café", "ids": [1, 2]}
+    assert response.status_code == 201
+
+
+def test_json_data_parses_objects_and_rejects_everything_else() -> None:
+    """Only a JSON object body yields fields; malformed or non-object bodies are empty."""
+    assert app_module._json_data(SimpleNamespace(body=b'{"a": 1}')) == {"a": 1}
+    assert app_module._json_data(SimpleNamespace(body='{"a": "b"}')) == {"a": "b"}
+    assert app_module._json_data(SimpleNamespace(body=b"[1, 2]")) == {}
+    assert app_module._json_data(SimpleNamespace(body=b"{not json")) == {}
+    assert app_module._json_data(SimpleNamespace(body=b"")) == {}
+
+
+def test_parse_qs_flat_matches_parse_qs_first_values() -> None:
+    """Form parsing decodes +/%xx, keeps blank and bare keys, and keeps the first value."""
+    body = "name=Jane+Doe&email=jane%40example.com&note=&flag&&name=second&caf%C3%A9=%E2%9C%93"
+
+    fields = app_module._parse_qs_flat(body)
+
+    assert fields == {
+        "name": "Jane Doe",
+        "email": "jane@example.com",
+        "note": "",
+        "flag": "",
+        "café": "✓",
+    }
+    expected = {key: values[0] for key, values in parse_qs(body, keep_blank_values=True).items()}
+    assert fields == expected
+    assert app_module._parse_qs_flat("") == {}
+
+
+def test_build_nav_escapes_only_the_per_user_values() -> None:
+    """Anonymous visitors get the shared nav; signed-in values are escaped per render."""
+    assert app_module._build_nav(None, "token") == app_module._NAV_ANONYMOUS
+    user = SimpleNamespace(username="<bob>")
+
+    nav = app_module._build_nav(user, 'a"b')
+
+    assert "Signed in as &lt;bob&gt;</span>" in nav
+    assert 'name="csrf_token" value="a&#34;b"' in nav
+    assert nav.endswith("</nav>")
+    assert "logout-form" not in app_module._build_nav(user, None)
+
+
+def test_json_data_stdlib_fallback_parses_bytes(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Without orjson the stdlib parser reads the raw bytes and still rejects bad UTF-8."""
+    monkeypatch.setattr(app_module, "orjson", None)
+
+    assert app_module._json_data(SimpleNamespace(body='{"name": "café"}'.encode())) == {"name": "café"}
+    assert app_module._json_data(SimpleNamespace(body=b'{"name": "\xff"}')) == {}
+
+
+def test_cookie_writers_use_prerendered_attributes() -> None:
+    """Precomputed cookie attributes match what _cookie_header builds from settings."""
+    set_cookies: list[str] = []
+    response = SimpleNamespace(headers=SimpleNamespace(append=lambda _name, value: set_cookies.append(value)))
+
+    app_module._set_csrf_cookie(response, "csrf")
+    app_module._set_session_cookie(response, "sess")
+    app_module._clear_session_cookie(response)
+
+    assert set_cookies == [
+        app_module._cookie_header("taglens_csrf", "csrf", app_module.csrf_cookie_settings()),
+        app_module._cookie_header("taglens_session", "sess", app_module.cookie_settings()),
+        app_module._cookie_header("taglens_session", "", app_module.cookie_clear_settings()),
+    ]
+    assert "HttpOnly" not in set_cookies[0]
+    assert "Max-Age=0" in set_cookies[2]
+    assert app_module._format_cookie("flag", "1", "") == "flag=1"
+
+
+class _AuthDb:
+    """Fake database serving one session row and recording lookups and revokes."""
+
+    def __init__(self, session: SessionRecord, user: UserRecord) -> None:
+        self.row = (session, user)
+        self.lookups = 0
+        self.revoked: list[str] = []
+
+    async def fetch_session_and_user_by_token_hash(self, token_hash: str):
+        self.lookups += 1
+        return self.row if token_hash == self.row[0].token_hash else None
+
+    async def revoke_session_by_hash(self, token_hash: str, revoked_at: str) -> None:
+        self.revoked.append(token_hash)
+
+
+@pytest.mark.asyncio
+async def test_auth_context_is_cached_until_the_session_is_revoked(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Repeat requests reuse the cached session; revoking drops it immediately."""
+    token = "raw-session-token"
+    token_hash = app_module.hash_session_token(token)
+    session = SessionRecord(
+        id=1,
+        user_id=2,
+        token_hash=token_hash,
+        created_at="2026-01-01T00:00:00",
+        expires_at="2999-01-01T00:00:00",
+        last_seen_at="2026-01-01T00:00:00",
+        user_agent=None,
+        ip_address=None,
+        revoked_at=None,
+    )
+    user = UserRecord(id=2, username="ann", email="ann@example.com", password_hash="x", created_at="")
+    fake = _AuthDb(session, user)
+    monkeypatch.setattr(app_module, "db", fake)
+    monkeypatch.setattr(app_module, "_auth_cache", {})
+    monkeypatch.setattr(app_module, "_queue_session_touch", lambda _session_id: None)
+    request = SimpleNamespace(headers={"cookie": f"taglens_session={token}"})
+
+    first = await app_module._get_auth_context(request)
+    second = await app_module._get_auth_context(request)
+
+    assert first.user == user and second.user == user
+    assert fake.lookups == 1
+
+    await app_module._revoke_session_token(token)
+    assert fake.revoked == [token_hash]
+    fake.row = (dataclasses.replace(session, revoked_at="now"), user)
+
+    third = await app_module._get_auth_context(request)
+    assert third.user is None and third.clear_cookie
+    assert fake.lookups == 2
+
+
+@pytest.mark.asyncio
+async def test_logout_during_slow_lookup_is_not_undone_by_the_cache(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A lookup that read the session before logout must not re-cache it."""
+    token = "raced-session-token"
+    token_hash = app_module.hash_session_token(token)
+    session = SessionRecord(
+        id=1,
+        user_id=2,
+        token_hash=token_hash,
+        created_at="2026-01-01T00:00:00",
+        expires_at="2999-01-01T00:00:00",
+        last_seen_at="2026-01-01T00:00:00",
+        user_agent=None,
+        ip_address=None,
+        revoked_at=None,
+    )
+    user = UserRecord(id=2, username="ann", email="ann@example.com", password_hash="x", created_at="")
+    fake = _AuthDb(session, user)
+    started = asyncio.Event()
+    release = asyncio.Event()
+    fast_lookup = fake.fetch_session_and_user_by_token_hash
+
+    async def slow_lookup(token_hash: str):
+        row = await fast_lookup(token_hash)
+        started.set()
+        await release.wait()
+        return row
+
+    fake.fetch_session_and_user_by_token_hash = slow_lookup
+    monkeypatch.setattr(app_module, "db", fake)
+    monkeypatch.setattr(app_module, "_auth_cache", {})
+    monkeypatch.setattr(app_module, "_queue_session_touch", lambda _session_id: None)
+    request = SimpleNamespace(headers={"cookie": f"taglens_session={token}"})
+
+    in_flight = asyncio.create_task(app_module._get_auth_context(request))
+    await started.wait()
+    await app_module._revoke_session_token(token)
+    fake.row = (dataclasses.replace(session, revoked_at="now"), user)
+    release.set()
+    await in_flight
+
+    assert token_hash not in app_module._auth_cache
+    fake.fetch_session_and_user_by_token_hash = fast_lookup
+    after = await app_module._get_auth_context(request)
+    assert after.user is None and after.clear_cookie
+
+
+def test_auth_cache_expires_and_stays_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Stale entries are ignored and the cache never grows past its cap."""
+    monkeypatch.setattr(app_module, "_auth_cache", {})
+    monkeypatch.setattr(app_module, "AUTH_CACHE_MAX_ENTRIES", 2)
+    session = SimpleNamespace()
+    user = SimpleNamespace()
+
+    for key in ("a", "b", "c"):
+        app_module._store_cached_auth(
+            key, session, user, generation=app_module._auth_cache_generation
+        )
+    assert list(app_module._auth_cache) == ["b", "c"]
+
+    app_module._auth_cache["b"] = (app_module.time.monotonic() - 1, session, user)
+    assert app_module._lookup_cached_auth("b") is None
+    assert "b" not in app_module._auth_cache
+    assert app_module._lookup_cached_auth("c") == (session, user)
+
+
+def test_request_cookies_parses_the_header_once_for_several_reads() -> None:
+    """Handlers that need both cookies get them from one parsed dict."""
+    request = SimpleNamespace(headers={"cookie": "taglens_csrf=c; taglens_session=s"})
+
+    assert app_module._request_cookies(request) == {"taglens_csrf": "c", "taglens_session": "s"}
+    assert app_module._request_cookies(SimpleNamespace(headers={})) == {}
+
+
+def test_form_data_prefers_native_fields_then_urlencoded_body() -> None:
+    """Robyn-parsed fields pass straight through; otherwise the body is decoded."""
+    native = {"email": "a@example.com"}
+    assert app_module._form_data(SimpleNamespace(form_data=native, headers={}, body=b"")) is native
+
+    request = SimpleNamespace(
+        form_data={},
+        headers={"content-type": "application/x-www-form-urlencoded"},
+        body=b"email=b%40example.com&password=x+y",
+    )
+    assert app_module._form_data(request) == {"email": "b@example.com", "password": "x y"}
+    assert app_module._form_data(SimpleNamespace(form_data={}, headers={}, body=b"a=1")) == {}
+
+
+def test_get_cookie_value_ignores_name_inside_other_cookies() -> None:
+    """The single-cookie fast path only matches whole keys, like the full parser."""
+    header = "x=taglens_csrf=evil; my_taglens_csrf=no; taglens_csrf =ok; taglens_csrf=late"
+    request = SimpleNamespace(headers={"cookie": header})
+
+    assert app_module._get_cookie_value(request, "taglens_csrf") == "ok"
+    assert app_module._get_cookie_value(request, "taglens_csrf") == (
+        app_module._parse_cookie_header(header)["taglens_csrf"]
+    )
+    assert app_module._get_cookie_value(SimpleNamespace(headers={"cookie": "taglens_csrf"}), "taglens_csrf") is None
+
+
+def test_parse_photo_id_accepts_ascii_digits_only() -> None:
+    assert app_module._parse_photo_id(" 42 ") == 42
+    assert app_module._parse_photo_id(7) == 7
+    assert app_module._parse_photo_id("0") == 0
+    for raw in ("", "-1", "+5", "1_000", "1 000", "1.5", "abc", "\u00b2", "\u0663", None):
+        assert app_module._parse_photo_id(raw) is None
+
+
+@pytest.mark.asyncio
+async def test_run_ollama_bounds_concurrent_calls(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Only as many Ollama calls as there are slots run on worker threads at once."""
+    monkeypatch.setattr(app_module, "_ollama_slots", asyncio.Semaphore(2))
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def fake_caption(image_bytes: bytes, *, filename: str) -> str:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return f"{filename}:{len(image_bytes)}"
+
+    results = await asyncio.gather(
+        *(app_module._run_ollama(fake_caption, b"img", filename=f"f{i}") for i in range(5))
+    )
+
+    assert results == [f"f{i}:3" for i in range(5)]
+    assert peak == 2
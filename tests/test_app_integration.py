@@ -120,6 +120,25 @@ def test_login_rejects_invalid_csrf(server: ServerInfo) -> None:
     assert client.get_cookie("taglens_session") is None
 
 
+def test_login_error_keeps_existing_csrf_cookie(server: ServerInfo) -> None:
+    client = TestClient(server.base_url)
+    login_page = client.request("GET", "/login")
+    csrf_token = _extract_csrf_token(login_page.body)
+    response = client.request(
+        "POST",
+        "/login",
+        data={
+            "email": "nobody@example.com",
+            "password": "not_a_real_password",
+            "next": "/dashboard",
+            "csrf_token": csrf_token,
+        },
+    )
+    assert response.status == 401
+    assert "taglens_csrf=" not in " ".join(response.headers.get_all("Set-Cookie") or [])
+    assert _extract_csrf_token(response.body) == csrf_token
+
+
 def test_login_creates_session_and_allows_dashboard(server: ServerInfo) -> None:
     client = TestClient(server.base_url)
     unique = uuid4().hex[:8]
@@ -245,6 +264,27 @@ def test_userprofile_js_route_returns_script(server: ServerInfo) -> None:
     response = client.request("GET", "/UserProfile.js")
     assert response.status == 200
     assert "placeholder loaded" in response.body
+    etag = response.headers.get("ETag")
+    assert etag
+    cached = client.request("GET", "/UserProfile.js", headers={"If-None-Match": etag})
+    assert cached.status == 304
+
+
+def test_styles_css_route_returns_cacheable_stylesheet(server: ServerInfo) -> None:
+    client = TestClient(server.base_url)
+    response = client.request("GET", "/styles.css")
+    assert response.status == 200
+    assert "text/css" in (response.headers.get("Content-Type") or "")
+    etag = response.headers.get("ETag")
+    assert etag
+    cached = client.request("GET", "/styles.css", headers={"If-None-Match": etag})
+    assert cached.status == 304
+    assert "immutable" not in (response.headers.get("Cache-Control") or "")
+    # Pages link the stylesheet as /styles.css?v=<content hash>, which is also the ETag.
+    version = etag.strip('"')
+    versioned = client.request("GET", f"/styles.css?v={version}")
+    assert versioned.status == 200
+    assert "immutable" in (versioned.headers.get("Cache-Control") or "")
 
 
 def test_photo_upload_persists_generated_description_field(server: ServerInfo) -> None:
@@ -371,8 +411,7 @@ def test_upload_sanitizes_filename_and_normalizes_content_type(server: ServerInf
         f"/api/photos/download?photo_id={saved['id']}",
     )
     assert download.status == 200
-    payload = json.loads(download.body)
-    assert payload["content_type"] == "image/png"
+    assert download.headers.get("content-type") == "image/png"
 
 
 def test_upload_defaults_unknown_content_type_to_octet_stream(server: ServerInfo) -> None:
@@ -401,8 +440,7 @@ def test_upload_defaults_unknown_content_type_to_octet_stream(server: ServerInfo
         f"/api/photos/download?photo_id={saved['id']}",
     )
     assert download.status == 200
-    payload = json.loads(download.body)
-    assert payload["content_type"] == "application/octet-stream"
+    assert download.headers.get("content-type") == "application/octet-stream"
 
 
 def test_profile_photo_sort_by_taken_date(server: ServerInfo) -> None:
@@ -522,10 +560,12 @@ def test_photo_download_returns_uploaded_binary(server: ServerInfo) -> None:
         f"/api/photos/download?photo_id={saved['id']}",
     )
     assert download.status == 200
-    payload = json.loads(download.body)
-    assert payload["filename"] == "download-me.webp"
-    assert payload["content_type"] == "image/webp"
-    assert base64.b64decode(payload["image_base64"]) == raw
+    assert download.headers.get("content-type") == "image/webp"
+    assert download.headers.get("content-disposition") == (
+        "attachment; filename*=UTF-8''download-me.webp"
+    )
+    assert download.headers.get("x-photo-id") == str(saved["id"])
+    assert download.body == raw.decode("utf-8")
 
 
 def test_photo_download_rejects_invalid_photo_id(server: ServerInfo) -> None:
@@ -720,6 +760,11 @@ def test_static_assets_and_favicon_available(server: ServerInfo) -> None:
     client = TestClient(server.base_url)
     favicon = client.request("GET", "/favicon.ico")
     assert favicon.status == 200
+    assert "image/svg+xml" in (favicon.headers.get("Content-Type") or "")
+    cached_favicon = client.request(
+        "GET", "/favicon.ico", headers={"If-None-Match": favicon.headers.get("ETag") or ""}
+    )
+    assert cached_favicon.status == 304
     tailwind = client.request("GET", "/static/tailwindcss.js")
     assert tailwind.status == 200
     assert "tailwind" in tailwind.body.lower()
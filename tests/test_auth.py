@@ -2,7 +2,8 @@
 Unit tests for auth token helpers.
 
 Purpose:
-    Verifies CSRF token comparison and session token hashing behavior.
+    Verifies CSRF token comparison, session token hashing and password
+    hashing behavior.
 
 Authorship (git history, mapped to real names):
     Daniel (l33tdaniel)
@@ -11,7 +12,10 @@ Authorship (git history, mapped to real names):
 from auth import (
     generate_csrf_token,
     generate_session_token,
+    hash_password,
+    pwd_context,
     verify_csrf_token,
+    verify_password,
     verify_session_token,
 )
 
@@ -26,3 +30,22 @@ def test_csrf_tokens_match() -> None:
     token = generate_csrf_token()
     assert verify_csrf_token(token, token)
     assert not verify_csrf_token(token, "wrong")
+
+
+def test_csrf_tokens_with_non_ascii_input_do_not_match() -> None:
+    token = generate_csrf_token()
+    assert not verify_csrf_token(token, "tökén")
+    assert not verify_csrf_token(None, token)
+    assert verify_csrf_token("tökén", "tökén")
+
+
+def test_password_hashes_verify_across_argon2_and_legacy_schemes() -> None:
+    hashed = hash_password("password123")
+    assert hashed.startswith("$argon2id$")
+    assert verify_password("password123", hashed)
+    assert not verify_password("wrong-password", hashed)
+    # Hashes written by passlib (argon2 and legacy PBKDF2) still verify.
+    assert verify_password("password123", pwd_context.hash("password123"))
+    legacy = pwd_context.handler("pbkdf2_sha256").hash("password123")
+    assert verify_password("password123", legacy)
+    assert not verify_password("password123", "not-a-hash")
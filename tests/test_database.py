@@ -8,11 +8,14 @@ Authorship (git history, mapped to real names):
     Daniel (l33tdaniel)
 """
 
-from datetime import datetime, timedelta
+import asyncio
+from datetime import datetime, timedelta, timezone
 import hashlib
+import sqlite3
 
 import pytest
 
+import database as database_module
 from database import Database
 
 
@@ -42,17 +45,29 @@ async def test_user_and_session_lifecycle(tmp_path) -> None:
     assert fetched_session is not None
     assert fetched_session.user_id == user.id
 
+    joined = await db.fetch_session_and_user_by_token_hash("tokenhash")
+    assert joined is not None
+    assert joined[0] == fetched_session
+    assert joined[1] == fetched_id
+
     touched_at = datetime.utcnow().isoformat()
     await db.touch_session(session.id, touched_at)
     touched = await db.fetch_session_by_token_hash("tokenhash")
     assert touched is not None
     assert touched.last_seen_at == touched_at
 
+    batched_at = datetime.utcnow().isoformat()
+    await db.touch_sessions([(session.id, batched_at)])
+    batched = await db.fetch_session_by_token_hash("tokenhash")
+    assert batched is not None
+    assert batched.last_seen_at == batched_at
+
     revoked_at = datetime.utcnow().isoformat()
     await db.revoke_session(session.id, revoked_at)
     revoked = await db.fetch_session_by_token_hash("tokenhash")
     assert revoked is not None
     assert revoked.revoked_at == revoked_at
+    await db.close()
 
 
 @pytest.mark.asyncio
@@ -70,6 +85,7 @@ async def test_user_settings_created_and_update(tmp_path) -> None:
     updated = await db.update_user_settings(user.id, ocr_enabled=False, ai_descriptions_enabled=False)
     assert updated.ocr_enabled == 0
     assert updated.ai_descriptions_enabled == 0
+    await db.close()
 
 
 @pytest.mark.asyncio
@@ -94,6 +110,8 @@ async def test_jobs_enqueue_and_claim(tmp_path) -> None:
     assert claimed.id == job_id
     assert claimed.status == "running"
     await db.complete_job(job_id)
+    await db.close()
+
 
 @pytest.mark.asyncio
 async def test_photo_shares_create_list_fetch_and_revoke(tmp_path) -> None:
@@ -124,6 +142,7 @@ async def test_photo_shares_create_list_fetch_and_revoke(tmp_path) -> None:
     fetched2 = await db.fetch_photo_share_by_token_hash(token_hash)
     assert fetched2 is not None
     assert fetched2.revoked_at is not None
+    await db.close()
 
 
 @pytest.mark.asyncio
@@ -151,6 +170,8 @@ async def test_image_metadata_includes_ai_description(tmp_path) -> None:
     assert len(rows) == 1
     assert rows[0].filename == "photo.jpg"
     assert rows[0].ai_description == "A person standing near a tree."
+    assert rows[0].image_data is None
+    await db.close()
 
 
 @pytest.mark.asyncio
@@ -175,6 +196,7 @@ async def test_list_images_can_sort_by_taken_date(tmp_path) -> None:
     )
     rows = await db.list_images_for_user(user.id, sort_by="taken", order="asc")
     assert [row.filename for row in rows] == ["b.jpg", "a.jpg"]
+    await db.close()
 
 
 @pytest.mark.asyncio
@@ -198,3 +220,154 @@ async def test_face_embedding_index_upsert_and_list(tmp_path) -> None:
     person_1 = next(row for row in rows if row.tag == "person_1")
     assert person_1.samples_count == 2
     assert person_1.embedding_json == "[0.2,0.3,0.4]"
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_face_embedding_bulk_upsert_matches_single_upserts(tmp_path) -> None:
+    db = Database(tmp_path / "test.db")
+    await db.initialize()
+    user = await db.create_user("erin", "erin@example.com", "hashed")
+
+    await db.upsert_face_embeddings_for_user(
+        user.id, [("person_1", "[0.1]"), ("person_2", "[0.2]")]
+    )
+    await db.upsert_face_embeddings_for_user(user.id, [("person_1", "[0.3]")])
+    await db.upsert_face_embeddings_for_user(user.id, [])
+
+    rows = {row.tag: row for row in await db.list_face_embeddings_for_user(user.id)}
+    assert rows["person_1"].samples_count == 2
+    assert rows["person_1"].embedding_json == "[0.3]"
+    assert rows["person_2"].samples_count == 1
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_reader_pool_never_exceeds_pool_size(tmp_path) -> None:
+    db = Database(tmp_path / "test.db", pool_size=2)
+    await db.initialize()
+
+    results = await asyncio.gather(*(db.healthcheck() for _ in range(20)))
+
+    assert all(results)
+    assert len(db._readers) <= 2
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_writer_connection_is_held_exclusively(tmp_path) -> None:
+    db = Database(tmp_path / "test.db")
+    await db.initialize()
+    events: list[str] = []
+
+    async def unit_of_work(name: str) -> None:
+        async with db._connection():
+            events.append(f"{name}:start")
+            await asyncio.sleep(0.01)
+            events.append(f"{name}:end")
+
+    await asyncio.gather(unit_of_work("a"), unit_of_work("b"))
+
+    assert events in (
+        ["a:start", "a:end", "b:start", "b:end"],
+        ["b:start", "b:end", "a:start", "a:end"],
+    )
+    await db.close()
+
+
+def test_pool_resets_when_event_loop_changes(tmp_path) -> None:
+    db = Database(tmp_path / "test.db")
+    asyncio.run(db.initialize())
+    first_writer = db._writer
+    first_lock = db._writer_lock
+    assert first_writer is not None
+
+    async def reuse() -> None:
+        assert await db.healthcheck()
+        user = await db.create_user("bob", "bob@example.com", "hashed")
+        assert await db.fetch_user_by_id(user.id) is not None
+        assert db._writer is not first_writer
+        assert db._writer_lock is not first_lock
+        await db.close()
+
+    asyncio.run(reuse())
+
+
+@pytest.mark.asyncio
+async def test_rotate_session_revokes_previous_and_creates_new(tmp_path) -> None:
+    db = Database(tmp_path / "test.db")
+    await db.initialize()
+    user = await db.create_user("carol", "carol@example.com", "hashed")
+    expires_at = (datetime.utcnow() + timedelta(hours=1)).isoformat()
+    old = await db.create_session(user_id=user.id, token_hash="old", expires_at=expires_at)
+
+    with pytest.raises(ValueError):
+        await db.rotate_session(
+            previous_token_hash="old", user_id=user.id, token_hash="new", expires_at=expires_at
+        )
+    new = await db.rotate_session(
+        previous_token_hash="old",
+        user_id=user.id,
+        token_hash="new",
+        expires_at=expires_at,
+        revoked_at="2026-01-01T00:00:00+00:00",
+        user_agent="pytest",
+    )
+
+    revoked = await db.fetch_session_by_token_hash("old")
+    current = await db.fetch_session_by_token_hash("new")
+    assert revoked is not None and revoked.id == old.id
+    assert revoked.revoked_at == "2026-01-01T00:00:00+00:00"
+    assert current == new
+    assert current.revoked_at is None
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_pooled_connections_apply_shared_pragmas(tmp_path) -> None:
+    db = Database(tmp_path / "test.db")
+    await db.initialize()
+
+    async with db._read_connection() as conn:
+        cursor = await conn.execute("PRAGMA journal_mode")
+        assert (await cursor.fetchone())[0] == "wal"
+        cursor = await conn.execute("PRAGMA mmap_size")
+        assert (await cursor.fetchone())[0] == 268435456
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_reader_connections_reject_writes(tmp_path) -> None:
+    db = Database(tmp_path / "test.db")
+    await db.initialize()
+
+    async with db._read_connection() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            await conn.execute("DELETE FROM users")
+    async with db._connection() as conn:
+        cursor = await conn.execute("PRAGMA query_only")
+        assert (await cursor.fetchone())[0] == 0
+    await db.close()
+
+
+def test_utc_now_iso_keeps_naive_stored_format() -> None:
+    stamp = database_module._utc_now_iso()
+    parsed = datetime.fromisoformat(stamp)
+    assert parsed.tzinfo is None
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    assert abs(parsed - now) < timedelta(seconds=5)
+
+
+@pytest.mark.asyncio
+async def test_user_foreign_keys_are_indexed(tmp_path) -> None:
+    db = Database(tmp_path / "test.db")
+    await db.initialize()
+
+    async with db._read_connection() as conn:
+        for table in ("sessions", "jobs"):
+            cursor = await conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT id FROM {table} WHERE user_id = ?", (1,)
+            )
+            plan = " ".join(row[3] for row in await cursor.fetchall())
+            assert f"idx_{table}_user_id" in plan
+    await db.close()
@@ -82,3 +82,20 @@ async def test_detect_and_tag_faces_returns_empty_when_detection_unavailable(mon
     faces = await tagging.detect_and_tag_faces_for_user(1, b"image", db)
     assert faces == []
     assert db.upserts == []
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_public_faces_payload_drops_embeddings_and_tolerates_bad_json(monkeypatch, use_orjson) -> None:
+    if not use_orjson:
+        monkeypatch.setattr(tagging, "orjson", None)
+    faces_json = json.dumps(
+        [{"x": 1, "y": 2.9, "w": 3, "h": 4, "tag": "person_1", "embedding": [0.1] * 512}, "junk"]
+    )
+
+    assert tagging.public_faces_payload(faces_json) == [
+        {"x": 1, "y": 2, "w": 3, "h": 4, "tag": "person_1"}
+    ]
+    assert tagging.public_faces_payload("[]") == []
+    assert tagging.public_faces_payload("") == []
+    assert tagging.public_faces_payload("{not json") == []
+    assert tagging.public_faces_payload('{"x": 1}') == []